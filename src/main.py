@@ -2,7 +2,7 @@ def show_total_size_to():
     """
     Affiche le poids total de tous les torrents (colonne 'bytes') en Téraoctets (To)
     """
-    with sqlite3.connect(DB_PATH) as conn:
+    with db_conn(readonly=True) as conn:
         c = conn.cursor()
         c.execute("SELECT SUM(bytes) FROM torrents WHERE bytes > 0")
         total_bytes = c.fetchone()[0] or 0
@@ -43,17 +43,30 @@ Fonctionnalités principales:
 
 import os
 import sys
-import argparse
 import asyncio
-import aiohttp
 import sqlite3
 import time
 import signal
+import threading
 import logging
 import json
+import queue
+import random
 import re
+import functools
+import itertools
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# orjson (optionnel) : décodage JSON plus rapide, repli sur le module standard
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_json_loads = orjson.loads if orjson else json.loads
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # CONSTANTES DE STATUTS POUR COHÉRENCE DANS TOUT LE CODE
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -102,6 +115,9 @@ logging.basicConfig(
 # Format : [TAG key=value key2=value2 ...] (valeurs sans espaces, ou entre guillemets)
 # Objectif : permettre grep/awk facile (ex: grep '^\[SYNC_END').
 # ──────────────────────────────────────────────────────────────────────────────
+_QUOTE_TRANS = str.maketrans({'"': "'"})
+_NEEDS_QUOTE = re.compile(r'[ =]')
+
 def log_event(tag: str, **fields):
     """Émet une ligne de log structurée parsable.
 
@@ -110,14 +126,10 @@ def log_event(tag: str, **fields):
         **fields: Paires clé=valeur (sans transformation). Les valeurs contenant
                   des espaces ou '=' seront entourées de guillemets doubles.
     """
-    parts = []
-    for k, v in fields.items():
-        if v is None:
-            continue
-        val = str(v)
-        if ' ' in val or '=' in val:
-            val = '"' + val.replace('"', "'") + '"'
-        parts.append(f"{k}={val}")
+    parts = [
+        f'{k}="{val.translate(_QUOTE_TRANS)}"' if _NEEDS_QUOTE.search(val := str(v)) else f"{k}={val}"
+        for k, v in fields.items() if v is not None
+    ]
     line = f"[{tag} {' '.join(parts)}]" if parts else f"[{tag}]"
     # Utilise logging.info pour rester homogène avec le reste
     logging.info(line)
@@ -130,11 +142,27 @@ def handle_sigint(signum, frame):
     logging.warning("Interruption clavier reçue (CTRL+C), arrêt propre...")
     stop_requested = True
 
-signal.signal(signal.SIGINT, handle_sigint)
+def install_signal_handlers():
+    """
+    Installe le gestionnaire CTRL+C
+    
+    Sans effet hors du thread principal (import depuis un worker web),
+    où signal.signal lèverait ValueError.
+    
+    Returns:
+        bool: True si le gestionnaire a été installé
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    try:
+        signal.signal(signal.SIGINT, handle_sigint)
+    except ValueError:
+        return False
+    return True
+
+install_signal_handlers()
 
 # Configuration via gestionnaire centralisé
-import sys
-import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from config_manager import get_config
 
@@ -154,6 +182,8 @@ BATCH_SIZE = config.get('realdebrid.batch_size', 250)
 QUOTA_WAIT_TIME = config.get('realdebrid.quota_wait', 60)
 TORRENT_QUOTA_WAIT = config.get('realdebrid.torrent_wait', 10)
 PAGE_WAIT_TIME = config.get('realdebrid.page_wait', 1.0)
+PAGE_CONCURRENCY = config.get('realdebrid.page_concurrency', 4)
+DETAILS_MAX_RPS = config.get('realdebrid.details_rps', 50)
 
 # DB_PATH sera initialisé dynamiquement via get_db_path()
 DB_PATH = get_db_path()
@@ -162,6 +192,8 @@ DB_PATH = get_db_path()
 # ║                         SECTION 2: UTILITAIRES ET HELPERS                 ║
 # ╚════════════════════════════════════════════════════════════════════════════╝
 
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
 def format_size(bytes_size):
     """
     Convertit les bytes en format lisible (KB, MB, GB, TB)
@@ -179,11 +211,24 @@ def format_size(bytes_size):
     if bytes_size is None:
         return "N/A"
     
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-        if bytes_size < 1024.0:
-            return f"{bytes_size:.1f} {unit}"
-        bytes_size /= 1024.0
-    return f"{bytes_size:.1f} PB"
+    # Index d'unité en O(1) : chaque unité correspond à 10 bits
+    size = int(bytes_size)
+    index = min((size.bit_length() - 1) // 10, 5) if size > 0 else 0
+    return f"{bytes_size / (1 << (index * 10)):.1f} {_SIZE_UNITS[index]}"
+
+_STATUS_EMOJIS = {
+    'downloaded': '✅',      # Téléchargement terminé
+    'downloading': '⬇️',     # En cours de téléchargement
+    'waiting': '⏳',         # En attente
+    'queued': '🔄',          # En file d'attente
+    'error': '❌',           # Erreur
+    'magnet_error': '🧲❌',   # Erreur magnet
+    'magnet_conversion': '🧲', # Conversion magnet
+    'virus': '🦠',           # Virus détecté
+    'dead': '💀',            # Torrent mort
+    'uploading': '⬆️',       # Upload en cours
+    'compressing': '🗜️'      # Compression en cours
+}
 
 def get_status_emoji(status):
     """
@@ -195,20 +240,7 @@ def get_status_emoji(status):
     Returns:
         str: Emoji correspondant au statut
     """
-    status_emojis = {
-        'downloaded': '✅',      # Téléchargement terminé
-        'downloading': '⬇️',     # En cours de téléchargement
-        'waiting': '⏳',         # En attente
-        'queued': '🔄',          # En file d'attente
-        'error': '❌',           # Erreur
-        'magnet_error': '🧲❌',   # Erreur magnet
-        'magnet_conversion': '🧲', # Conversion magnet
-        'virus': '🦠',           # Virus détecté
-        'dead': '💀',            # Torrent mort
-        'uploading': '⬆️',       # Upload en cours
-        'compressing': '🗜️'      # Compression en cours
-    }
-    return status_emojis.get(status, '❓')
+    return _STATUS_EMOJIS.get(status, '❓')
 
 def safe_int(value, default=0):
     """
@@ -246,6 +278,108 @@ def safe_float(value, default=0.0):
 # ║                           SECTION 3: BASE DE DONNÉES                      ║
 # ╚════════════════════════════════════════════════════════════════════════════╝
 
+def _tune_connection(conn):
+    """
+    Applique les PRAGMA de performance sur une connexion SQLite
+    
+    - WAL : les lecteurs (interface web) ne bloquent plus l'écrivain
+    - synchronous=NORMAL : plus de fsync à chaque commit (sûr en mode WAL)
+    - cache, mmap et tables temporaires en mémoire
+    - busy_timeout : attente plutôt qu'échec immédiat si la base est verrouillée
+    
+    Args:
+        conn (sqlite3.Connection): Connexion à configurer
+        
+    Returns:
+        sqlite3.Connection: La même connexion, pour chaînage
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+# Pools de connexions SQLite réutilisées (PRAGMA appliqués une seule fois,
+# cache de pages conservé entre deux appels) : lecture/écriture, et lecteurs
+# en query_only (en WAL, les lectures ne bloquent pas l'écrivain)
+_DB_POOL = queue.Queue(maxsize=8)
+_DB_READ_POOL = queue.Queue(maxsize=os.cpu_count() or 4)
+# Requêtes préparées conservées par connexion (textes SQL constants du module)
+DB_STATEMENT_CACHE = 128
+
+@contextmanager
+def db_conn(readonly=False):
+    """
+    Emprunte une connexion au pool (création paresseuse si le pool est vide)
+    
+    S'utilise comme `with db_conn() as conn:` : commit en
+    sortie normale, rollback sur exception, puis retour de la connexion
+    au pool au lieu de sa fermeture.
+    
+    Args:
+        readonly (bool): Connexion du pool des lecteurs (PRAGMA query_only),
+            pour les requêtes qui n'écrivent rien (tables temporaires comprises)
+    
+    Yields:
+        sqlite3.Connection: Connexion configurée par _tune_connection
+    """
+    pool = _DB_READ_POOL if readonly else _DB_POOL
+    conn = None
+    while conn is None:
+        try:
+            path, pooled = pool.get_nowait()
+        except queue.Empty:
+            path, pooled = DB_PATH, _tune_connection(
+                sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=DB_STATEMENT_CACHE)
+            )
+            if readonly:
+                pooled.execute("PRAGMA query_only=1")
+        # Connexion ouverte sur une autre base (chemin modifié entre-temps)
+        if path != DB_PATH:
+            pooled.close()
+        else:
+            conn = pooled
+    try:
+        with conn:
+            yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            pool.put_nowait((path, conn))
+        except queue.Full:
+            conn.close()
+
+def iter_ids(query, params=(), batch_size=1000):
+    """
+    Itère sur les IDs d'une requête par pages indexées (pagination par clé)
+    
+    Chaque page (`id > dernier ID lu`) est lue sur une connexion empruntée le
+    temps de la requête seulement : aucun instantané de lecture ne reste
+    ouvert pendant la synchronisation, le WAL peut donc être recyclé pendant
+    que DbWriter écrit. Les IDs insérés en cours de parcours au-delà de la
+    dernière clé lue sont également vus.
+    
+    Args:
+        query (str): Requête SELECT dont la première colonne s'appelle id
+        params (tuple): Paramètres de la requête
+        batch_size (int): Nombre d'IDs lus par page
+        
+    Yields:
+        str: ID suivant (ordre croissant)
+    """
+    paged = f"SELECT id FROM ({query}) WHERE id > ? ORDER BY id LIMIT ?"
+    last_id = ''
+    while True:
+        with db_conn(readonly=True) as conn:
+            rows = conn.execute(paged, (*params, last_id, batch_size)).fetchall()
+        if not rows:
+            return
+        yield from (row[0] for row in rows)
+        last_id = rows[-1][0]
+
 def create_tables():
     """
     Initialise la base de données SQLite avec les tables nécessaires
@@ -259,6 +393,7 @@ def create_tables():
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
     
     conn = sqlite3.connect(db_path)
+    _tune_connection(conn)
     cursor = conn.cursor()
     
     # Table principale des torrents (informations de base)
@@ -304,6 +439,47 @@ def create_tables():
         )
     ''')
     
+    # Cache des agrégats coûteux de --stats (JSON), valide tant que la
+    # génération des données (data_generation) n'a pas changé
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stats_cache (
+            k TEXT PRIMARY KEY,
+            v TEXT,
+            gen INTEGER
+        )
+    ''')
+    try:
+        cursor.execute("ALTER TABLE stats_cache ADD COLUMN gen INTEGER")
+    except sqlite3.OperationalError:
+        # La colonne existe déjà
+        pass
+    
+    # Compteur de génération de torrent_details, incrémenté par triggers à
+    # chaque écriture qui modifie les colonnes des tops de --stats (quel que
+    # soit l'écrivain : synchronisations, nettoyage, interface web)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            gen INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO data_generation (id, gen) VALUES (0, 0)")
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_details_gen_insert AFTER INSERT ON torrent_details
+        BEGIN UPDATE data_generation SET gen = gen + 1; END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_details_gen_delete AFTER DELETE ON torrent_details
+        BEGIN UPDATE data_generation SET gen = gen + 1; END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_details_gen_update
+        AFTER UPDATE OF name, size, status, host ON torrent_details
+        WHEN OLD.name IS NOT NEW.name OR OLD.size IS NOT NEW.size
+          OR OLD.status IS NOT NEW.status OR OLD.host IS NOT NEW.host
+        BEGIN UPDATE data_generation SET gen = gen + 1; END
+    ''')
+    
     # Ajouter la nouvelle colonne health_error si elle n'existe pas
     try:
         cursor.execute("ALTER TABLE torrent_details ADD COLUMN health_error TEXT")
@@ -313,9 +489,20 @@ def create_tables():
         pass
     
     # Index pour optimiser les performances
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_torrents_status ON torrents(status)')
+    # (status, id) couvre les sélections d'IDs par statut sans relire la table
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_torrents_status_id ON torrents(status, id)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_torrents_added ON torrents(added_on)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_details_status ON torrent_details(status)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_details_status_id ON torrent_details(status, id)')
+    # Anciens index sur status seul, redondants avec les index composites
+    cursor.execute('DROP INDEX IF EXISTS idx_torrents_status')
+    cursor.execute('DROP INDEX IF EXISTS idx_details_status')
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_sync_progress_op_id ON sync_progress(operation, last_processed_id)')
+    # Index partiels des tops de --stats : GROUP BY host et ORDER BY size LIMIT 5
+    # parcourent l'index au lieu de trier toute la table
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_details_host ON torrent_details(host) WHERE host IS NOT NULL AND host != ''")
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_details_size ON torrent_details(size DESC) WHERE size > 0 AND name IS NOT NULL')
+    # Index partiel des torrents avec message d'erreur (--diagnose-errors)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_details_error ON torrent_details(id) WHERE error IS NOT NULL')
     
     conn.commit()
     conn.close()
@@ -328,18 +515,16 @@ def get_db_stats():
     Returns:
         tuple: (total_torrents, total_details, coverage_percent)
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Compte total des torrents
-    cursor.execute("SELECT COUNT(*) FROM torrents")
-    total_torrents = cursor.fetchone()[0]
-    
-    # Compte des détails disponibles
-    cursor.execute("SELECT COUNT(*) FROM torrent_details")
-    total_details = cursor.fetchone()[0]
-    
-    conn.close()
+    with db_conn(readonly=True) as conn:
+        cursor = conn.cursor()
+        
+        # Compte total des torrents
+        cursor.execute("SELECT COUNT(*) FROM torrents")
+        total_torrents = cursor.fetchone()[0]
+        
+        # Compte des détails disponibles
+        cursor.execute("SELECT COUNT(*) FROM torrent_details")
+        total_details = cursor.fetchone()[0]
     
     coverage = (total_details / total_torrents * 100) if total_torrents > 0 else 0
     return total_torrents, total_details, coverage
@@ -351,19 +536,17 @@ def clear_database():
     Supprime toutes les données des tables tout en conservant la structure.
     Opération irréversible, demande confirmation explicite.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute("DELETE FROM torrent_details")
-    cursor.execute("DELETE FROM torrents")
-    
-    # Reset des compteurs auto-increment seulement si la table existe
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='sqlite_sequence'")
-    if cursor.fetchone():
-        cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('torrents', 'torrent_details')")
-    
-    conn.commit()
-    conn.close()
+    with db_conn() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute("DELETE FROM torrent_details")
+        cursor.execute("DELETE FROM torrents")
+        cursor.execute("DELETE FROM stats_cache")
+        
+        # Reset des compteurs auto-increment seulement si la table existe
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='sqlite_sequence'")
+        if cursor.fetchone():
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name IN ('torrents', 'torrent_details')")
     
     logging.info("Base de données vidée avec succès")
     print("✅ Base de données complètement vidée")
@@ -372,6 +555,11 @@ def clear_database():
 # ║                           SECTION 4: API REAL-DEBRID                      ║
 # ╚════════════════════════════════════════════════════════════════════════════╝
 
+# Expressions de nettoyage/validation du token, compilées une seule fois
+_TOKEN_CTRL_RE = re.compile(r'[\r\n\t\f\v]')
+_TOKEN_WS_RE = re.compile(r'\s+')
+_TOKEN_VALID_RE = re.compile(r'^[A-Za-z0-9_-]+\Z')
+
 def load_token():
     """
     Récupère le token Real-Debrid depuis la configuration centralisée
@@ -385,8 +573,6 @@ def load_token():
     Raises:
         SystemExit: Si aucun token valide trouvé
     """
-    import re
-    
     def clean_token(raw_token):
         """Nettoie un token de tous les caractères parasites"""
         if not raw_token:
@@ -396,13 +582,13 @@ def load_token():
         token = str(raw_token).strip()
         
         # Étape 2 : Suppression de tous les caractères de contrôle
-        token = re.sub(r'[\r\n\t\f\v]', '', token)
+        token = _TOKEN_CTRL_RE.sub('', token)
         
         # Étape 3 : Suppression des espaces multiples
-        token = re.sub(r'\s+', '', token)
+        token = _TOKEN_WS_RE.sub('', token)
         
         # Étape 4 : Validation format (seuls alphanumériques, tirets, underscores)
-        if not re.match(r'^[A-Za-z0-9_-]+$', token):
+        if not _TOKEN_VALID_RE.match(token):
             return None
             
         # Étape 5 : Validation longueur (tokens RD font généralement 40-60 caractères)
@@ -467,12 +653,29 @@ def load_token():
     
     sys.exit(1)
 
-async def api_request(session, url, headers, params=None, max_retries=3):
+def _jittered_backoff(base, previous, cap):
+    """
+    Délai de backoff avec « decorrelated jitter »
+    
+    Tire le délai entre base et 3x le délai précédent : des coroutines
+    rejetées au même instant ne se réveillent plus toutes ensemble.
+    
+    Args:
+        base (float): Délai minimal
+        previous (float): Délai précédent (ou de référence)
+        cap (float): Délai maximal
+        
+    Returns:
+        float: Délai à attendre en secondes
+    """
+    return min(cap, random.uniform(base, previous * 3))
+
+async def api_request(session, url, headers, params=None, max_retries=3, return_headers=False, rate_limiter=None):
     """
     Fonction générique pour les appels API Real-Debrid avec gestion d'erreurs complète
     
     Features:
-    - Retry automatique avec backoff exponentiel
+    - Retry automatique avec backoff exponentiel et jitter
     - Gestion des quotas API (429)
     - Gestion des erreurs d'authentification
     - Support interruption propre (CTRL+C)
@@ -483,15 +686,28 @@ async def api_request(session, url, headers, params=None, max_retries=3):
         headers (dict): Headers incluant l'authentification
         params (dict, optional): Paramètres de requête
         max_retries (int): Nombre maximum de tentatives
+        return_headers (bool): Retourner aussi les headers de la réponse
+        rate_limiter (DynamicRateLimiter, optional): Reçoit les headers de quota
+            de chaque réponse, y compris 429 et erreurs serveur (avant retry)
         
     Returns:
-        dict/None: Réponse JSON ou None en cas d'erreur
+        dict/None: Réponse JSON ou None en cas d'erreur, ou le tuple
+        (json, headers) si return_headers (headers vides en cas d'erreur)
     """
+    failed = (None, {}) if return_headers else None
+    quota_wait = None
     for attempt in range(max_retries):
         if stop_requested:
-            return None
+            return failed
         try:
             async with session.get(url, headers=headers, params=params) as resp:
+                # Quota annoncé transmis avant toute décision de retry : les
+                # réponses 429/5xx sont celles dont les headers comptent le plus
+                if rate_limiter is not None:
+                    rate_limiter.update_from_headers(
+                        resp.headers.get('X-RateLimit-Remaining'), resp.headers.get('X-RateLimit-Reset')
+                    )
+                
                 # Gestion des erreurs d'authentification
                 if resp.status == 401 or resp.status == 403:
                     logging.error("Token Real-Debrid invalide ou expiré.")
@@ -499,51 +715,168 @@ async def api_request(session, url, headers, params=None, max_retries=3):
                 
                 # Torrent non trouvé (normal dans certains cas)
                 if resp.status == 404:
-                    return None
+                    return failed
                 
                 # Gestion du quota API
                 if resp.status == 429:
-                    wait_time = QUOTA_WAIT_TIME if params else TORRENT_QUOTA_WAIT
-                    logging.warning(f"Quota API dépassé, attente {wait_time}s...")
-                    await asyncio.sleep(wait_time)
+                    base_wait = QUOTA_WAIT_TIME if params else TORRENT_QUOTA_WAIT
+                    quota_wait = _jittered_backoff(base_wait, quota_wait or base_wait, base_wait * 2)
+                    logging.warning(f"Quota API dépassé, attente {quota_wait:.1f}s...")
+                    await asyncio.sleep(quota_wait)
                     continue
                 
                 resp.raise_for_status()
-                return await resp.json()
+                data = await resp.json(loads=_json_loads)
+                return (data, resp.headers) if return_headers else data
                 
         except Exception as e:
             if attempt == max_retries - 1:
                 logging.error(f"Erreur API après {max_retries} tentatives: {e}")
-                return None
-            # Backoff exponentiel
-            await asyncio.sleep(2 ** attempt)
-    return None
+                return failed
+            # Backoff exponentiel avec jitter (plafonné à 30s)
+            await asyncio.sleep(_jittered_backoff(1, 2 ** attempt, 30))
+    return failed
+
+# Sessions HTTP partagées, une par boucle asyncio (aiohttp lie une session à sa boucle)
+_sessions = {}
+
+def _get_session():
+    """
+    Retourne la session aiohttp partagée de la boucle courante (création paresseuse)
+    
+    Une seule session par boucle garde le pool keep-alive chaud entre la
+    pagination des torrents et la récupération des détails.
+    
+    Returns:
+        aiohttp.ClientSession: Session partagée
+    """
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        # Import différé : la pile HTTP (la majeure partie du temps d'import
+        # du module) n'est chargée que par les synchronisations
+        import aiohttp
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=MAX_CONCURRENT * 2, limit_per_host=MAX_CONCURRENT,
+                keepalive_timeout=60, ttl_dns_cache=300
+            ),
+            timeout=aiohttp.ClientTimeout(total=15, connect=5)
+        )
+        _sessions[loop] = session
+    return session
+
+async def aclose_session():
+    """Ferme la session partagée de la boucle courante si elle existe"""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
 
-async def fetch_all_torrents(token):
+def run_async(coro):
+    """
+    Exécute une coroutine dans une nouvelle boucle puis ferme la session partagée
+    
+    Args:
+        coro: Coroutine à exécuter
+        
+    Returns:
+        Résultat de la coroutine
+    """
+    async def runner():
+        try:
+            return await coro
+        finally:
+            await aclose_session()
+    return asyncio.run(runner())
+
+async def fetch_all_torrents(token, session=None):
     """
     Récupère tous les torrents depuis l'API Real-Debrid avec temporisation adaptative
     
     Utilise la pagination pour récupérer tous les torrents par batches de 5000.
+    La première page annonce le total (header X-Total-Count) : les pages
+    suivantes sont alors récupérées en parallèle (PAGE_CONCURRENCY au plus).
+    Sans ce header, repli sur une pagination séquentielle.
     Sauvegarde directement en base pour éviter la surcharge mémoire.
     Temporisation adaptative selon les erreurs détectées.
     
     Args:
         token (str): Token d'authentification Real-Debrid
+        session (aiohttp.ClientSession, optional): Session à utiliser,
+            la session partagée par défaut
         
     Returns:
-        int: Nombre total de torrents récupérés
+        tuple: (nombre total de torrents récupérés, nombre de lignes
+               insérées ou modifiées en base)
     """
     headers = {"Authorization": f"Bearer {token}"}
     limit = 5000
     page = 1
     total = 0
+    page_sizes = {}
     
     # Variables pour la temporisation adaptative
     page_wait = PAGE_WAIT_TIME  # Utilise la constante définie
     consecutive_errors = 0
     
-    async with aiohttp.ClientSession() as session:
-        while True:
+    # Écrivain unique : les commits ne bloquent plus la boucle asyncio
+    writer = DbWriter()
+    writer.start()
+    
+    # Session HTTP partagée (évite un handshake TLS par flux)
+    session = session or _get_session()
+    
+    async def save_page(page_num, torrents):
+        """Envoie une page à l'écrivain et met à jour les compteurs"""
+        nonlocal total
+        await writer.put(_INSERT_TORRENT_SQL, [_torrent_row(t) for t in torrents])
+        await writer.put(_UPDATE_TORRENT_SQL, [_torrent_update_row(t) for t in torrents])
+        page_sizes[page_num] = len(torrents)
+        total += len(torrents)
+        logging.info(f"📄 Page {page_num}: {len(torrents)} torrents ({total} total)")
+    
+    semaphore = asyncio.Semaphore(PAGE_CONCURRENCY)
+    
+    async def fetch_page(page_num):
+        """Récupère une page sous le sémaphore, pause comprise"""
+        async with semaphore:
+            if stop_requested:
+                return False
+            torrents = await api_request(session, RD_API_URL, headers, {"page": page_num, "limit": limit})
+            if torrents:
+                await save_page(page_num, torrents)
+            await asyncio.sleep(page_wait)
+            return bool(torrents)
+    
+    try:
+        # Page 1 : le header X-Total-Count donne le nombre de pages à récupérer
+        torrents, resp_headers = await api_request(
+            session, RD_API_URL, headers, {"page": page, "limit": limit}, return_headers=True
+        )
+        if not torrents:
+            return total, 0
+        await save_page(page, torrents)
+        
+        pages = -(-safe_int(resp_headers.get('X-Total-Count')) // limit)
+        if pages > 1:
+            # ⚡ Pages restantes en parallèle (bornées par le sémaphore)
+            page_numbers = range(2, pages + 1)
+            results = await asyncio.gather(*(fetch_page(p) for p in page_numbers))
+            
+            # Une seule relance, séquentielle, pour les pages en échec
+            for page_num in [p for p, ok in zip(page_numbers, results) if not ok]:
+                if stop_requested:
+                    break
+                logging.warning(f"⚠️ Relance de la page {page_num}")
+                await asyncio.sleep(page_wait * 1.5)
+                if not await fetch_page(page_num):
+                    logging.warning(f"⚠️ Page {page_num} ignorée après relance")
+        
+        # Sans header, on continue séquentiellement tant que la page est pleine
+        more = not pages and page_sizes[1] == limit
+        page += 1
+        
+        while more:
             if stop_requested:
                 logging.info("Arrêt demandé, interruption de la récupération des torrents.")
                 break
@@ -560,26 +893,25 @@ async def fetch_all_torrents(token):
                 # ✅ Succès - Reset du compteur d'erreurs
                 consecutive_errors = 0
                 
-                # Sauvegarde immédiate en base
-                for t in torrents:
-                    upsert_torrent(t)
-                    
-                total += len(torrents)
-                logging.info(f"📄 Page {page}: {len(torrents)} torrents ({total} total)")
+                # Sauvegarde en base via l'écrivain (transactions groupées)
+                await save_page(page, torrents)
                 page += 1
                 
+                # Page incomplète : c'était la dernière
+                if len(torrents) < limit:
+                    break
+                
                 # 🎯 TEMPORISATION ADAPTATIVE
-                if len(torrents) == limit:  # S'il y a encore des pages
-                    if consecutive_errors > 0:
-                        # Pause plus longue si des erreurs ont été détectées récemment
-                        adaptive_wait = page_wait * (1 + consecutive_errors * 0.5)
-                        logging.info(f"⏸️ Pause adaptative {adaptive_wait:.1f}s (après {consecutive_errors} erreurs)")
-                        await asyncio.sleep(adaptive_wait)
-                        consecutive_errors = 0  # Reset après pause adaptative
-                    else:
-                        # Pause normale
-                        await asyncio.sleep(page_wait)
-                        logging.info(f"⏸️ Pause normale {page_wait}s")
+                if consecutive_errors > 0:
+                    # Pause plus longue si des erreurs ont été détectées récemment
+                    adaptive_wait = page_wait * (1 + consecutive_errors * 0.5)
+                    logging.info(f"⏸️ Pause adaptative {adaptive_wait:.1f}s (après {consecutive_errors} erreurs)")
+                    await asyncio.sleep(adaptive_wait)
+                    consecutive_errors = 0  # Reset après pause adaptative
+                else:
+                    # Pause normale
+                    await asyncio.sleep(page_wait)
+                    logging.info(f"⏸️ Pause normale {page_wait}s")
                 
             except Exception as e:
                 # ❌ Erreur détectée - Incrémenter le compteur
@@ -593,10 +925,12 @@ async def fetch_all_torrents(token):
                 
                 # Ne pas incrémenter page - retry la même page
                 continue
+    finally:
+        await writer.close()
                 
-    return total
+    return total, writer.changes
 
-async def fetch_torrent_detail(session, token, torrent_id):
+async def fetch_torrent_detail(session, token, torrent_id, writer=None, rate_limiter=None, progress_op=None):
     """
     Récupère les détails complets d'un torrent spécifique
     
@@ -604,6 +938,11 @@ async def fetch_torrent_detail(session, token, torrent_id):
         session: Session aiohttp
         token (str): Token d'authentification
         torrent_id (str): ID du torrent
+        writer (DbWriter, optional): Écrivain asynchrone ; sinon écriture immédiate
+        rate_limiter (DynamicRateLimiter, optional): Reçoit les headers de quota
+            de chaque réponse (X-RateLimit-Remaining / X-RateLimit-Reset)
+        progress_op (str, optional): Opération reprenable dont la progression
+            est écrite avec le détail (même transaction, requiert writer)
         
     Returns:
         dict/None: Détails du torrent ou None si erreur
@@ -611,12 +950,35 @@ async def fetch_torrent_detail(session, token, torrent_id):
     url = f"https://api.real-debrid.com/rest/1.0/torrents/info/{torrent_id}"
     headers = {"Authorization": f"Bearer {token}"}
     
-    detail = await api_request(session, url, headers)
+    detail = await api_request(session, url, headers, rate_limiter=rate_limiter)
     if detail:
         logging.debug(f"Détail récupéré pour {torrent_id}")
-        upsert_torrent_detail(detail)
+        if writer is not None:
+            statements = [(_UPSERT_DETAIL_SQL, [_detail_row(detail)])]
+            if progress_op:
+                statements.append((_PROGRESS_SQL, [_progress_row(progress_op, torrent_id)]))
+            await writer.put_group(statements)
+        else:
+            upsert_torrent_detail(detail)
     return detail
 
+# INSERT OR IGNORE + UPDATE conditionnel : une page re-synchronisée dont les
+# torrents n'ont pas changé ne réécrit aucune page de la table ni des index
+_INSERT_TORRENT_SQL = '''INSERT OR IGNORE INTO torrents (id, filename, status, bytes, added_on)
+    VALUES (?, ?, ?, ?, ?)'''
+
+_UPDATE_TORRENT_SQL = '''UPDATE torrents SET filename = ?, status = ?, bytes = ?
+    WHERE id = ? AND (status IS NOT ? OR bytes IS NOT ? OR filename IS NOT ?)'''
+
+def _torrent_row(t):
+    """Construit le tuple de colonnes torrents à partir d'un torrent API"""
+    return (t.get('id'), t.get('filename'), t.get('status'), t.get('bytes'), t.get('added'))
+
+def _torrent_update_row(t):
+    """Construit les paramètres de _UPDATE_TORRENT_SQL à partir d'un torrent API"""
+    filename, status, size = t.get('filename'), t.get('status'), t.get('bytes')
+    return (filename, status, size, t.get('id'), status, size, filename)
+
 def upsert_torrent(t):
     """
     Insert ou met à jour un torrent dans la table torrents
@@ -624,80 +986,180 @@ def upsert_torrent(t):
     Args:
         t (dict): Données du torrent depuis l'API
     """
-    with sqlite3.connect(DB_PATH) as conn:
+    with db_conn() as conn:
         c = conn.cursor()
-        c.execute('''INSERT OR REPLACE INTO torrents (id, filename, status, bytes, added_on)
-            VALUES (?, ?, ?, ?, ?)''',
-            (t.get('id'), t.get('filename'), t.get('status'), t.get('bytes'), t.get('added'))
-        )
-        conn.commit()
+        c.execute(_INSERT_TORRENT_SQL, _torrent_row(t))
+        c.execute(_UPDATE_TORRENT_SQL, _torrent_update_row(t))
 
-def upsert_torrent_detail(detail):
+def _detail_row(detail):
     """
-    Insert ou met à jour les détails d'un torrent dans la table torrent_details
+    Construit le tuple de colonnes torrent_details à partir d'un détail API
     
     Args:
         detail (dict): Détails du torrent depuis l'API
-    """
-    if not detail or not detail.get('id'):
-        return
         
-    # Extraire les liens de téléchargement et de streaming
-    download_links = []
-    streaming_links = []
-    
-    # Parcourir les fichiers du torrent
-    files = detail.get('files', [])
-    for file_info in files:
-        # Lien de téléchargement
-        download_link = file_info.get('link', '')
-        if download_link:
-            download_links.append(download_link)
-        
-        # Lien de streaming - plusieurs champs possibles selon l'API Real-Debrid
-        streaming_link = (
-            file_info.get('streamable_link') or 
-            file_info.get('streaming_link') or 
-            file_info.get('stream_link') or
-            file_info.get('alternative_link') or
-            ''
-        )
-        streaming_links.append(streaming_link)
+    Returns:
+        tuple: (id, name, status, size, files_count, progress, links,
+                streaming_links, hash, host, error, added)
+    """
+    # Extraire les liens de téléchargement et de streaming (compréhensions
+    # plutôt qu'une boucle d'append : coût dominant pour les gros torrents)
+    files = detail.get('files') or ()
+    download_links = [f['link'] for f in files if f.get('link')]
+    # Lien de streaming - plusieurs champs possibles selon l'API Real-Debrid
+    streaming_links = [
+        f.get('streamable_link') or f.get('streaming_link') or
+        f.get('stream_link') or f.get('alternative_link') or ''
+        for f in files
+    ]
     
     # Si pas de fichiers, utiliser l'ancien format (liste de liens directe)
     if not files and detail.get('links'):
         download_links = detail.get('links', [])
         # Pour l'ancien format, on ne peut pas deviner les liens de streaming
         streaming_links = [''] * len(download_links)
-        
-    with sqlite3.connect(DB_PATH) as conn:
+    
+    return (
+        detail.get('id'),
+        detail.get('filename') or detail.get('name'),
+        detail.get('status'),
+        detail.get('bytes'),
+        len(files),
+        detail.get('progress'),
+        ",".join(download_links) if download_links else None,
+        ",".join(streaming_links) if streaming_links else None,
+        detail.get('hash'),
+        detail.get('host'),
+        detail.get('error'),
+        detail.get('added')
+    )
+
+# UPSERT natif : health_error (alimenté par le health check) n'est jamais touché
+_UPSERT_DETAIL_SQL = '''INSERT INTO torrent_details
+    (id, name, status, size, files_count, progress, links, streaming_links, hash, host, error, added)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        name=excluded.name, status=excluded.status, size=excluded.size,
+        files_count=excluded.files_count, progress=excluded.progress, links=excluded.links,
+        streaming_links=excluded.streaming_links, hash=excluded.hash, host=excluded.host,
+        error=excluded.error, added=excluded.added'''
+
+def upsert_torrent_detail(detail):
+    """
+    Insert ou met à jour les détails d'un torrent dans la table torrent_details
+    
+    Args:
+        detail (dict): Détails du torrent depuis l'API
+    """
+    if not detail or not detail.get('id'):
+        return
+    
+    with db_conn() as conn:
         c = conn.cursor()
+        c.execute(_UPSERT_DETAIL_SQL, _detail_row(detail))
+
+class DbWriter:
+    """
+    Écrivain SQLite unique alimenté par une file asyncio
+    
+    Les coroutines déposent des lignes sans jamais bloquer la boucle : une
+    tâche dédiée regroupe jusqu'à `flush_size` lignes (ou ce qui est arrivé
+    en `flush_interval` secondes) et les écrit dans une seule transaction,
+    depuis un thread dédié. Un seul écrivain évite la contention sur le
+    verrou d'écriture SQLite.
+    
+    Attributes:
+        flush_size (int): Nombre de lignes max par transaction
+        flush_interval (float): Délai (s) laissé au lot pour se remplir
+        changes (int): Nombre total de lignes modifiées
+    """
+    
+    def __init__(self, flush_size=500, flush_interval=0.2):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.changes = 0
+        self.conn = _tune_connection(sqlite3.connect(DB_PATH, check_same_thread=False))
+        # Un curseur par requête : executemany réutilise l'instruction compilée
+        self._stmts = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='redriva-db')
+        self._queue = asyncio.Queue(maxsize=1000)
+        self._task = None
+        
+    def start(self):
+        """Démarre la tâche d'écriture sur la boucle courante"""
+        self._task = asyncio.create_task(self._run())
+        
+    async def put(self, sql, rows):
+        """
+        Dépose des lignes à écrire
         
-        # Récupérer le health_error existant pour le préserver
-        c.execute('SELECT health_error FROM torrent_details WHERE id = ?', (detail.get('id'),))
-        existing_health_error = c.fetchone()
-        preserved_health_error = existing_health_error[0] if existing_health_error else None
-        
-        c.execute('''INSERT OR REPLACE INTO torrent_details
-            (id, name, status, size, files_count, progress, links, streaming_links, hash, host, error, added, health_error)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-            (
-                detail.get('id'),
-                detail.get('filename') or detail.get('name'),
-                detail.get('status'),
-                detail.get('bytes'),
-                len(detail.get('files', [])),
-                detail.get('progress'),
-                ",".join(download_links) if download_links else None,
-                ",".join(streaming_links) if streaming_links else None,
-                detail.get('hash'),
-                detail.get('host'),
-                detail.get('error'),
-                detail.get('added'),
-                preserved_health_error  # Préserver le health_error existant
-            )
-        )
-        conn.commit()
+        Args:
+            sql (str): Requête paramétrée
+            rows (list): Tuples de paramètres
+        """
+        if rows:
+            await self._queue.put(((sql, rows),))
+            
+    async def put_group(self, statements):
+        """
+        Dépose plusieurs requêtes écrites ensemble (même transaction, tout ou rien)
+        
+        Args:
+            statements (list): Couples (sql, rows)
+        """
+        group = tuple((sql, rows) for sql, rows in statements if rows)
+        if group:
+            await self._queue.put(group)
+            
+    async def _run(self):
+        """Vide la file par lots et délègue l'écriture au thread dédié"""
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            # Laisser le lot se remplir avant d'écrire
+            await asyncio.sleep(self.flush_interval)
+            count = sum(len(rows) for _, rows in items[0])
+            while count < self.flush_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                items.append(item)
+                count += sum(len(rows) for _, rows in item)
+            try:
+                await loop.run_in_executor(self._executor, self._write, items)
+            except Exception as e:
+                logging.error(f"❌ Erreur écriture base ({count} lignes): {e}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+                    
+    def _cursor(self, sql):
+        """Retourne le curseur dédié à une requête (créé au premier usage)"""
+        cursor = self._stmts.get(sql)
+        if cursor is None:
+            cursor = self._stmts[sql] = self.conn.cursor()
+        return cursor
+        
+    def _write(self, items):
+        """Écrit un lot dans une seule transaction (thread écrivain)"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for group in items:
+                for sql, rows in group:
+                    self.changes += self._cursor(sql).executemany(sql, rows).rowcount
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+            
+    async def close(self):
+        """Écrit les lignes en attente puis libère la connexion"""
+        if self._task is not None:
+            await self._queue.join()
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._stmts.clear()
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.conn.close)
+        self._executor.shutdown(wait=False)
 
 # ╔════════════════════════════════════════════════════════════════════════════╗
 # ║                         SECTION 5: SYNCHRONISATION                        ║  
@@ -708,28 +1170,44 @@ class DynamicRateLimiter:
     Contrôleur dynamique de concurrence pour optimiser les performances API
     
     Ajuste automatiquement le nombre de requêtes simultanées selon:
-    - Taux de succès/échec
-    - Performance générale
-    - Respect des quotas API
+    - Taux d'échec lissé (moyenne mobile exponentielle)
+    - Augmentation additive / diminution multiplicative (AIMD)
+    - Respect des quotas API (headers X-RateLimit-* quand l'API les expose)
     
     Attributes:
         concurrent (int): Nombre actuel de requêtes simultanées
         max_concurrent (int): Limite maximale
         success_count (int): Compteur de succès
         error_count (int): Compteur d'erreurs
+        ewma_err (float): Taux d'erreur lissé (0.0 à 1.0)
+        header_rate (float/None): Débit permis par le quota restant annoncé
     """
     
+    # Poids de la dernière requête dans la moyenne mobile
+    EWMA_ALPHA = 0.02
+    # Seuils de taux d'erreur lissé pour augmenter / réduire
+    LOW_ERROR_RATE = 0.02
+    HIGH_ERROR_RATE = 0.1
+    # Délai minimal (s) entre deux ajustements
+    ADJUST_INTERVAL = 2
+    
     def __init__(self, initial_concurrent=20, max_concurrent=80):
         self.concurrent = initial_concurrent
         self.max_concurrent = max_concurrent
         self.success_count = 0
         self.error_count = 0
-        self.last_adjustment = time.time()
+        self.ewma_err = 0.0
+        self.last_adjustment = time.monotonic()
+        self.header_rate = None
+        self.header_expiry = 0.0
         
     def adjust_concurrency(self, success=True):
         """
         Ajuste la concurrence selon les résultats
         
+        +1 requête simultanée quand le taux d'erreur lissé est bas, division
+        par deux quand il dépasse le seuil haut (schéma AIMD façon TCP).
+        
         Args:
             success (bool): True si la dernière requête a réussi
         """
@@ -737,63 +1215,302 @@ class DynamicRateLimiter:
             self.success_count += 1
         else:
             self.error_count += 1
+        
+        self.ewma_err = (1 - self.EWMA_ALPHA) * self.ewma_err + self.EWMA_ALPHA * (0 if success else 1)
+        
+        now = time.monotonic()
+        if now - self.last_adjustment <= self.ADJUST_INTERVAL:
+            return
+        
+        # Réduire fortement si trop d'erreurs
+        if self.ewma_err > self.HIGH_ERROR_RATE and self.concurrent > 5:
+            self.concurrent = max(5, self.concurrent // 2)
+            self.last_adjustment = now
+            logging.info(f"📉 Concurrence réduite à {self.concurrent}")
+        # Augmenter progressivement si peu d'erreurs
+        elif self.ewma_err < self.LOW_ERROR_RATE and self.concurrent < self.max_concurrent:
+            self.concurrent += 1
+            self.last_adjustment = now
+            logging.debug(f"📈 Concurrence augmentée à {self.concurrent}")
             
-        # Ajustement périodique ou après un seuil
-        if (self.success_count + self.error_count) % 50 == 0 or time.time() - self.last_adjustment > 30:
-            error_rate = self.error_count / max(1, self.success_count + self.error_count)
+    def update_from_headers(self, remaining, reset):
+        """
+        Ralentit avant le quota à partir des headers de limite de débit
+        
+        Le débit permis est le quota restant réparti jusqu'à la remise à
+        zéro ; la concurrence ne dépasse pas le quota restant. Sans headers
+        (ou valeurs illisibles), seul l'ajustement sur échecs s'applique.
+        
+        Args:
+            remaining: Valeur de X-RateLimit-Remaining (requêtes restantes)
+            reset: Valeur de X-RateLimit-Reset (timestamp epoch ou secondes restantes)
+        """
+        try:
+            remaining = float(remaining)
+            reset = float(reset)
+        except (TypeError, ValueError):
+            return
+        
+        # Timestamp epoch ou délai relatif selon l'ordre de grandeur
+        window = max(1.0, reset - time.time() if reset > 1e9 else reset)
+        self.header_rate = max(remaining, 1) / window
+        self.header_expiry = time.monotonic() + window
+        
+        if remaining < self.concurrent:
+            self.concurrent = max(1, int(remaining))
+            self.last_adjustment = time.monotonic()
+            logging.debug(f"📉 Quota restant {remaining:.0f} : concurrence à {self.concurrent}")
             
-            # Augmenter si peu d'erreurs
-            if error_rate < 0.05:
-                self.concurrent = min(self.max_concurrent, int(self.concurrent * 1.2))
-                logging.info(f"📈 Concurrence augmentée à {self.concurrent}")
-            # Réduire si trop d'erreurs
-            elif error_rate > 0.15:
-                self.concurrent = max(5, int(self.concurrent * 0.7))
-                logging.info(f"📉 Concurrence réduite à {self.concurrent}")
-                
-            self.last_adjustment = time.time()
-            self.success_count = self.error_count = 0
+    def rate_cap(self):
+        """
+        Débit maximal imposé par les derniers headers de quota
+        
+        Returns:
+            float/None: Requêtes/seconde, ou None si aucun quota connu (ou expiré)
+        """
+        if self.header_rate is not None and time.monotonic() < self.header_expiry:
+            return self.header_rate
+        return None
             
-    def get_semaphore(self):
-        """Retourne un semaphore avec la concurrence actuelle"""
-        return asyncio.Semaphore(self.concurrent)
+class TokenBucket:
+    """
+    Régulateur de débit (requêtes/seconde) indépendant de la concurrence
+    
+    Chaque requête consomme un jeton ; les jetons se rechargent en continu
+    au débit `rate`, avec une réserve maximale d'une seconde de débit.
+    
+    Attributes:
+        rate (float): Débit autorisé en requêtes par seconde
+        tokens (float): Jetons disponibles
+    """
+    
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.last = time.monotonic()
+        self.lock = asyncio.Lock()
+        
+    def _refill(self):
+        """Ajoute les jetons accumulés depuis le dernier passage"""
+        now = time.monotonic()
+        # Réserve d'au moins un jeton, même à moins d'une requête par seconde
+        self.tokens = min(max(self.rate, 1), self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        
+    async def acquire(self):
+        """Attend qu'un jeton soit disponible puis le consomme"""
+        async with self.lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+            
+    def set_rate(self, rate):
+        """Change le débit (la réserve est plafonnée au nouveau débit)"""
+        self._refill()
+        self.rate = rate
+        self.tokens = min(self.tokens, max(rate, 1))
 
-def save_progress(processed_ids, filename="data/sync_progress.json"):
+class AdmissionController:
+    """
+    Limite de requêtes simultanées redimensionnable à chaud
+    
+    Compteur protégé par une asyncio.Condition : contrairement à un
+    Semaphore, la limite peut être modifiée pendant que des tâches attendent.
+    
+    Attributes:
+        active (int): Nombre de tâches admises en cours
+        limit (int): Nombre maximal de tâches admises simultanément
     """
-    Sauvegarde la progression d'une synchronisation pour reprise ultérieure
+    
+    def __init__(self, limit):
+        self.active = 0
+        self.limit = limit
+        self._cond = asyncio.Condition()
+        
+    async def acquire(self):
+        """Attend qu'une place se libère sous la limite courante"""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+            
+    async def release(self):
+        """Libère une place et réveille une tâche en attente"""
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify(1)
+            
+    async def set_limit(self, limit):
+        """Change la limite ; les tâches en attente réévaluent leur admission"""
+        async with self._cond:
+            self.limit = limit
+            self._cond.notify_all()
+            
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+        
+    async def __aexit__(self, *exc_info):
+        await self.release()
+
+# Une ligne déjà présente (reprise précédente) est rafraîchie : sinon une
+# ligne de plus de 6h resterait ignorée par load_progress
+_PROGRESS_SQL = """INSERT INTO sync_progress (operation, last_processed_id, start_time, status)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(operation, last_processed_id) DO UPDATE SET
+        start_time = excluded.start_time, status = excluded.status"""
+
+def _progress_row(operation, torrent_id):
+    """
+    Construit la ligne sync_progress marquant un ID comme traité
+    
+    Les lignes sont ajoutées une à une (jamais de réécriture de l'ensemble)
+    via l'écrivain, dans la même transaction que la ligne de détail.
     
     Args:
-        processed_ids (set): IDs des torrents déjà traités
-        filename (str): Chemin du fichier de sauvegarde
+        operation (str): Nom de l'opération reprenable
+        torrent_id (str): ID traité
+        
+    Returns:
+        tuple: Paramètres de _PROGRESS_SQL
     """
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    with open(filename, 'w') as f:
-        json.dump({
-            'processed_ids': list(processed_ids),
-            'timestamp': time.time()
-        }, f)
+    return (operation, torrent_id, time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()), 'processed')
 
-def load_progress(filename="data/sync_progress.json"):
+def load_progress(operation="details"):
     """
     Charge la progression d'une synchronisation précédente
     
     Args:
-        filename (str): Chemin du fichier de sauvegarde
+        operation (str): Nom de l'opération reprenable
         
     Returns:
         set: IDs des torrents déjà traités (max 6h d'ancienneté)
     """
     try:
-        with open(filename, 'r') as f:
-            data = json.load(f)
-            # Ignorer si plus de 6 heures
-            if time.time() - data['timestamp'] < 21600:
-                return set(data['processed_ids'])
-    except:
-        pass
-    return set()
+        with db_conn(readonly=True) as conn:
+            c = conn.cursor()
+            c.execute("""
+                SELECT last_processed_id FROM sync_progress
+                WHERE operation = ? AND datetime(start_time) > datetime('now', '-6 hours')
+            """, (operation,))
+            return {row[0] for row in c.fetchall()}
+    except sqlite3.Error:
+        return set()
 
-async def fetch_all_torrent_details_v2(token, torrent_ids, resumable=False):
+def clear_progress(operation="details"):
+    """
+    Supprime la progression enregistrée d'une opération terminée
+    
+    Args:
+        operation (str): Nom de l'opération reprenable
+    """
+    with db_conn() as conn:
+        conn.execute("DELETE FROM sync_progress WHERE operation = ?", (operation,))
+
+class ProcCtx:
+    """
+    État partagé par les workers de fetch_all_torrent_details_v2
+    
+    Attributs à emplacements fixes (__slots__) : accès direct plutôt que
+    via les cellules d'une fermeture à chaque détail traité.
+    
+    Attributes:
+        processed (int): Détails traités avec succès (reprise comprise)
+        bucket (TokenBucket): Régulateur de débit des requêtes
+    """
+    __slots__ = ('token', 'session', 'writer', 'rate_limiter', 'admission',
+                 'processed_ids', 'resumable', 'bucket', 'processed')
+    
+    def __init__(self, token, session, writer, rate_limiter, admission, processed_ids, resumable):
+        self.token = token
+        self.session = session
+        self.writer = writer
+        self.rate_limiter = rate_limiter
+        self.admission = admission
+        self.processed_ids = processed_ids
+        self.resumable = resumable
+        self.bucket = None
+        self.processed = 0
+
+def _target_rate(rate_limiter):
+    """
+    Débit proportionnel à la concurrence courante (plafond DETAILS_MAX_RPS),
+    borné par le quota restant annoncé par l'API
+    
+    Args:
+        rate_limiter (DynamicRateLimiter): Contrôleur de concurrence
+        
+    Returns:
+        float: Requêtes par seconde
+    """
+    rate = max(1, DETAILS_MAX_RPS * rate_limiter.concurrent / rate_limiter.max_concurrent)
+    cap = rate_limiter.rate_cap()
+    return rate if cap is None else min(rate, cap)
+
+async def _process_detail(ctx, tid):
+    """
+    Traite un torrent et ajuste la concurrence selon le résultat
+    
+    Args:
+        ctx (ProcCtx): État partagé des workers
+        tid (str): ID du torrent
+        
+    Returns:
+        dict/None: Détails du torrent ou None si erreur
+    """
+    rate_limiter = ctx.rate_limiter
+    admission = ctx.admission
+    bucket = ctx.bucket
+    writer = ctx.writer
+    
+    async with admission:
+        await bucket.acquire()
+        # Progression écrite avec le détail : jamais marquée traitée sans lui
+        result = await fetch_torrent_detail(
+            ctx.session, ctx.token, tid, writer, rate_limiter,
+            progress_op='details' if ctx.resumable else None
+        )
+    success = result is not None
+    rate_limiter.adjust_concurrency(success)
+    # Échecs (429 compris) et quota annoncé ajustent concurrence et débit ensemble
+    rate = _target_rate(rate_limiter)
+    if bucket.rate != rate:
+        bucket.set_rate(rate)
+    if admission.limit != rate_limiter.concurrent:
+        await admission.set_limit(rate_limiter.concurrent)
+    
+    if success:
+        ctx.processed += 1
+        ctx.processed_ids.add(tid)
+    
+    return result
+
+async def _log_detail_stats(ctx, total_ids, start_time, interval=10):
+    """
+    Affiche périodiquement débit, ETA et concurrence jusqu'à annulation
+    
+    Tâche séparée : aucun calcul de statistiques sur le chemin de chaque requête.
+    
+    Args:
+        ctx (ProcCtx): État partagé des workers
+        total_ids (int): Nombre total d'IDs à traiter
+        start_time (float): Début du traitement (time.time())
+        interval (float): Délai en secondes entre deux affichages
+    """
+    initial_processed = ctx.processed
+    while True:
+        await asyncio.sleep(interval)
+        elapsed = time.time() - start_time
+        rate = (ctx.processed - initial_processed) / elapsed if elapsed > 0 else 0
+        remaining = total_ids - ctx.processed
+        eta = remaining / rate if rate > 0 else 0
+        
+        logging.info(f"📊 {ctx.processed}/{total_ids} | "
+                     f"{rate:.1f}/s | ETA: {eta/60:.1f}min | "
+                     f"Concurrence: {ctx.rate_limiter.concurrent}")
+
+async def fetch_all_torrent_details_v2(token, torrent_ids, resumable=False, session=None, total=None):
     """
     Version optimisée pour récupérer les détails de torrents (sync-fast et sync-smart)
     
@@ -806,92 +1523,117 @@ async def fetch_all_torrent_details_v2(token, torrent_ids, resumable=False):
     
     Args:
         token (str): Token Real-Debrid
-        torrent_ids (list): Liste des IDs à traiter
+        torrent_ids (iterable): IDs à traiter (liste ou générateur, parcouru une fois)
         resumable (bool): Si True, permet la reprise
+        session (aiohttp.ClientSession, optional): Session à utiliser,
+            la session partagée par défaut
+        total (int, optional): Nombre d'IDs, requis si torrent_ids n'a pas de len()
         
     Returns:
         int: Nombre de détails traités avec succès
     """
-    # Gestion de la reprise
+    total_ids = len(torrent_ids) if total is None else total
+    
+    # Gestion de la reprise : générateur plutôt qu'une copie filtrée de la liste
     if resumable:
         processed_ids = load_progress()
-        remaining_ids = [tid for tid in torrent_ids if tid not in processed_ids]
+        remaining_ids = (tid for tid in torrent_ids if tid not in processed_ids)
         if processed_ids:
-            logging.info(f"📂 Reprise: {len(processed_ids)} déjà traités, {len(remaining_ids)} restants")
+            # Estimation : les IDs ne sont parcourus qu'une seule fois
+            total_remaining = max(0, total_ids - len(processed_ids))
+            logging.info(f"📂 Reprise: {len(processed_ids)} déjà traités, ~{total_remaining} restants")
     else:
-        remaining_ids = torrent_ids
+        remaining_ids = iter(torrent_ids)
         processed_ids = set()
     
-    if not remaining_ids:
+    if not total_ids:
         logging.info("✅ Tous les détails sont à jour !")
         return len(processed_ids)
     
     rate_limiter = DynamicRateLimiter()
-    total_processed = len(processed_ids)
+    # Compteur cumulé (reprise comprise) ; le débit ne compte que ce run
+    initial_processed = len(processed_ids)
     start_time = time.time()
     
-    # Pool de connexions optimisé
-    connector = aiohttp.TCPConnector(limit=100, limit_per_host=50, keepalive_timeout=30)
-    timeout = aiohttp.ClientTimeout(total=15, connect=5)
+    # Session HTTP partagée (pool de connexions déjà chaud)
+    session = session or _get_session()
     
-    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-        
-        async def process_torrent_optimized(tid):
-            """Traite un torrent avec contrôle de concurrence dynamique"""
-            semaphore = rate_limiter.get_semaphore()
-            async with semaphore:
-                result = await fetch_torrent_detail(session, token, tid)
-                success = result is not None
-                rate_limiter.adjust_concurrency(success)
-                
-                if success:
-                    nonlocal total_processed
-                    total_processed += 1
-                    processed_ids.add(tid)
-                    
-                    # Stats temps réel + sauvegarde périodique
-                    if total_processed % 100 == 0:
-                        elapsed = time.time() - start_time
-                        rate = (total_processed - len(processed_ids)) / elapsed if elapsed > 0 else 0
-                        remaining = len(torrent_ids) - total_processed
-                        eta = remaining / rate if rate > 0 else 0
-                        
-                        logging.info(f"📊 {total_processed}/{len(torrent_ids)} | "
-                                   f"{rate:.1f}/s | ETA: {eta/60:.1f}min | "
-                                   f"Concurrence: {rate_limiter.concurrent}")
-                        
-                        if resumable:
-                            save_progress(processed_ids)
-                
-                return result
-        
-        # Traitement par chunks adaptatifs
-        chunk_size = min(300, len(remaining_ids))
-        for i in range(0, len(remaining_ids), chunk_size):
+    # Écrivain unique : détails et progression écrits hors de la boucle
+    writer = DbWriter()
+    writer.start()
+    
+    admission = AdmissionController(rate_limiter.concurrent)
+    
+    ctx = ProcCtx(token, session, writer, rate_limiter, admission, processed_ids, resumable)
+    ctx.bucket = TokenBucket(_target_rate(rate_limiter))
+    ctx.processed = initial_processed
+    stats_task = asyncio.create_task(_log_detail_stats(ctx, total_ids, start_time))
+    
+    # Pool de workers persistants dimensionné sur le maximum : l'admission
+    # (et non le nombre de workers) borne les requêtes en vol. La file bornée
+    # applique une contre-pression sur le producteur.
+    queue = asyncio.Queue(maxsize=rate_limiter.max_concurrent * 2)
+    
+    async def worker():
+        """Consomme la file jusqu'à annulation"""
+        while True:
+            tid = await queue.get()
+            try:
+                await _process_detail(ctx, tid)
+            except Exception as e:
+                logging.warning(f"⚠️ Erreur détail {tid}: {e}")
+            finally:
+                queue.task_done()
+    
+    workers = [asyncio.create_task(worker()) for _ in range(min(rate_limiter.max_concurrent, total_ids))]
+    
+    try:
+        # Producteur : alimente la file en continu (pas de pause entre lots)
+        # Le générateur garde sa propre référence : la liste peut être libérée
+        torrent_ids = None
+        for tid in remaining_ids:
             if stop_requested:
                 break
-                
-            chunk_ids = remaining_ids[i:i+chunk_size]
-            tasks = [process_torrent_optimized(tid) for tid in chunk_ids]
-            
-            await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Pause adaptative entre chunks
-            if i + chunk_size < len(remaining_ids):
-                pause = max(3, 20 - rate_limiter.concurrent * 0.2)
-                logging.info(f"⏸️  Pause {pause:.1f}s...")
-                await asyncio.sleep(pause)
-    
+            await queue.put(tid)
+        
+        await queue.join()
+    finally:
+        stats_task.cancel()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(stats_task, *workers, return_exceptions=True)
+        await writer.close()
+
     elapsed = time.time() - start_time
-    processed_new = total_processed - len(set(processed_ids) - processed_ids)
+    processed_new = ctx.processed - initial_processed
     logging.info(f"🎉 Terminé ! {processed_new} nouveaux détails en {elapsed/60:.1f}min "
-                 f"({processed_new/elapsed:.1f} torrents/s)")
-    
-    # Nettoyer le fichier de progression si terminé
-    if resumable and os.path.exists("data/sync_progress.json"):
-        os.remove("data/sync_progress.json")
-    
-    return total_processed
+                 f"({processed_new/elapsed if elapsed > 0 else 0:.1f} torrents/s)")
+    
+    # Nettoyer la progression si terminé (conservée en cas d'interruption)
+    if resumable and not stop_requested:
+        clear_progress('details')
+    
+    return ctx.processed
+
+# Placeholders et requête du résumé construits une fois (statuts constants)
+_ACTIVE_PH = ','.join('?' * len(ACTIVE_STATUSES))
+_ERROR_PH = ','.join('?' * len(ERROR_STATUSES))
+
+# Les 4 compteurs en un seul aller-retour :
+# nouveaux (sans détails), actifs, en erreur, anciens (>7 jours)
+# added_on est stocké tel que renvoyé par l'API (ISO 8601, ex. 2024-01-05T10:00:00.000Z) :
+# comparer la colonne brute à une borne au même format permet d'utiliser idx_torrents_added
+_SQL_UPDATE_SUMMARY = f'''
+    SELECT
+        (SELECT COUNT(*) FROM torrents t
+         WHERE NOT EXISTS (SELECT 1 FROM torrent_details td WHERE td.id = t.id)),
+        (SELECT COUNT(*) FROM torrent_details
+         WHERE status IN ({_ACTIVE_PH})),
+        (SELECT COUNT(*) FROM torrent_details
+         WHERE status IN ({_ERROR_PH}) OR error IS NOT NULL),
+        (SELECT COUNT(*) FROM torrents
+         WHERE added_on < strftime('%Y-%m-%dT%H:%M:%S', 'now', '-7 days'))
+'''
 
 def get_smart_update_summary():
     """
@@ -906,40 +1648,10 @@ def get_smart_update_summary():
     Returns:
         dict: Résumé des changements détectés
     """
-    with sqlite3.connect(DB_PATH) as conn:
+    with db_conn(readonly=True) as conn:
         c = conn.cursor()
-        
-        # Nouveaux torrents (pas de détails)
-        c.execute('''
-            SELECT COUNT(*) FROM torrents t
-            LEFT JOIN torrent_details td ON t.id = td.id
-            WHERE td.id IS NULL
-        ''')
-        new_count = c.fetchone()[0]
-        
-        # Téléchargements actifs (utilisation des constantes)
-        placeholders = ','.join('?' * len(ACTIVE_STATUSES))
-        c.execute(f'''
-            SELECT COUNT(*) FROM torrent_details
-            WHERE status IN ({placeholders})
-        ''', ACTIVE_STATUSES)
-        active_count = c.fetchone()[0]
-        
-        # Torrents en erreur (pour retry) - utilisation des constantes d'erreur
-        placeholders = ','.join('?' * len(ERROR_STATUSES))
-        c.execute(f'''
-            SELECT COUNT(*) FROM torrent_details
-            WHERE status IN ({placeholders}) OR error IS NOT NULL
-        ''', ERROR_STATUSES)
-        error_count = c.fetchone()[0]
-        
-        # Torrents anciens (plus de 7 jours sans mise à jour)
-        c.execute('''
-            SELECT COUNT(*) FROM torrents t
-            LEFT JOIN torrent_details td ON t.id = td.id
-            WHERE datetime('now') - datetime(t.added_on) > 7
-        ''')
-        old_count = c.fetchone()[0]
+        c.execute(_SQL_UPDATE_SUMMARY, ACTIVE_STATUSES + ERROR_STATUSES)
+        new_count, active_count, error_count, old_count = c.fetchone()
         
         return {
             'new_torrents': new_count,
@@ -961,7 +1673,7 @@ def get_torrents_needing_update():
     Returns:
         list: Liste des IDs de torrents à mettre à jour
     """
-    with sqlite3.connect(DB_PATH) as conn:
+    with db_conn(readonly=True) as conn:
         c = conn.cursor()
         c.execute('''
             SELECT t.id FROM torrents t
@@ -969,10 +1681,17 @@ def get_torrents_needing_update():
             WHERE td.id IS NULL 
                OR (td.status IN ('downloading', 'queued', 'waiting_files_selection'))
                OR (td.status = 'error' OR td.error IS NOT NULL)
-               OR datetime('now') - datetime(t.added_on) > 7
+               OR t.added_on < strftime('%Y-%m-%dT%H:%M:%S', 'now', '-7 days')
         ''')
         return [row[0] for row in c.fetchall()]
 
+# Sondes par index, arrêtées à la première ligne trouvée
+_SQL_HAS_PENDING_DETAILS = """
+    SELECT EXISTS (SELECT 1 FROM torrent_details WHERE status = 'error')
+        OR EXISTS (SELECT 1 FROM torrents WHERE status IN ('downloading', 'queued', 'magnet_conversion'))
+        OR EXISTS (SELECT 1 FROM torrents t WHERE NOT EXISTS (SELECT 1 FROM torrent_details td WHERE td.id = t.id))
+"""
+
 def sync_smart(token):
     """
     Synchronisation intelligente optimisée - Mode recommandé pour usage quotidien
@@ -1002,89 +1721,74 @@ def sync_smart(token):
     logging.info("🚀 [PHASE 1] Mise à jour ultra-rapide des statuts...")
     log_event('SYNC_PHASE_START', mode='smart', phase=1, name='status_refresh')
     
-    # Sauvegarder les anciens statuts pour comparaison
-    old_statuses = {}
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        c.execute("SELECT id, status FROM torrents")
-        old_statuses = dict(c.fetchall())
-    
-    # Utiliser torrents_only() pour mise à jour rapide des statuts
-    total_torrents = asyncio.run(fetch_all_torrents(token))
-    
-    if total_torrents > 0:
-        logging.info(f"✅ Statuts mis à jour : {total_torrents} torrents (phase 1 terminée)")
-        log_event('SYNC_PHASE_END', mode='smart', phase=1, torrents=total_torrents, status='success')
-    else:
-        logging.info("❌ Aucun torrent récupéré, arrêt de la synchronisation")
-        log_event('SYNC_ABORT', mode='smart', reason='no_torrents')
-        return
-    
-    # ==========================================
-    # 🎯 PHASE 2 : Analyse des changements
-    # ==========================================
-    logging.info("🎯 [PHASE 2] Analyse intelligente des changements...")
-    log_event('SYNC_PHASE_START', mode='smart', phase=2, name='change_analysis')
-    
-    # Récupérer les nouveaux statuts après torrents_only()
-    new_statuses = {}
-    torrents_needing_details = set()
-    
-    with sqlite3.connect(DB_PATH) as conn:
+    # Sauvegarder les anciens statuts pour comparaison : instantané dans une
+    # table temporaire, propre à cette connexion gardée jusqu'à la phase 2
+    with db_conn() as conn:
         c = conn.cursor()
+        c.execute("DROP TABLE IF EXISTS temp.old_status")
+        c.execute("CREATE TEMP TABLE old_status (id TEXT PRIMARY KEY, status TEXT)")
+        c.execute("INSERT INTO old_status SELECT id, status FROM torrents")
+        conn.commit()
         
-        # Récupérer les nouveaux statuts
-        c.execute("SELECT id, status FROM torrents")
-        new_statuses = dict(c.fetchall())
-        
-        # 1. Nouveaux torrents (pas dans torrent_details)
-        c.execute("""
-            SELECT t.id FROM torrents t 
-            LEFT JOIN torrent_details td ON t.id = td.id 
-            WHERE td.id IS NULL
-        """)
-        new_torrents = [row[0] for row in c.fetchall()]
-        
-        # 2. Torrents avec changement de statut
-        status_changed = []
-        for torrent_id, new_status in new_statuses.items():
-            old_status = old_statuses.get(torrent_id)
-            if old_status != new_status:
-                status_changed.append(torrent_id)
-        
-        # 3. Téléchargements actifs (toujours à jour)
-        c.execute("""
-            SELECT id FROM torrents 
-            WHERE status IN ('downloading', 'queued', 'magnet_conversion')
-        """)
-        active_downloads = [row[0] for row in c.fetchall()]
-        
-        # 4. Torrents en erreur (retry)
-        c.execute("""
-            SELECT id FROM torrent_details 
-            WHERE status = 'error'
-        """)
-        error_torrents = [row[0] for row in c.fetchall()]
-        
-        # Fusionner toutes les listes (éviter doublons)
-        torrents_needing_details.update(new_torrents)
-        torrents_needing_details.update(status_changed)
-        torrents_needing_details.update(active_downloads)
-        torrents_needing_details.update(error_torrents)
+        # Utiliser torrents_only() pour mise à jour rapide des statuts
+        total_torrents, rows_changed = run_async(fetch_all_torrents(token))
+        
+        if total_torrents > 0:
+            logging.info(f"✅ Statuts mis à jour : {total_torrents} torrents (phase 1 terminée)")
+            log_event('SYNC_PHASE_END', mode='smart', phase=1, torrents=total_torrents, status='success')
+        else:
+            logging.info("❌ Aucun torrent récupéré, arrêt de la synchronisation")
+            log_event('SYNC_ABORT', mode='smart', reason='no_torrents')
+            return
+        
+        # ==========================================
+        # 🎯 PHASE 2 : Analyse des changements
+        # ==========================================
+        logging.info("🎯 [PHASE 2] Analyse intelligente des changements...")
+        log_event('SYNC_PHASE_START', mode='smart', phase=2, name='change_analysis')
+        
+        # Aucune ligne modifiée en phase 1 : seuls des détails manquants, des
+        # téléchargements actifs ou des erreurs justifient l'analyse complète
+        if not rows_changed and not c.execute(_SQL_HAS_PENDING_DETAILS).fetchone()[0]:
+            rows = []
+        else:
+            # Une seule requête : chaque ligne porte les critères qu'elle remplit
+            # (nouveau, statut modifié, téléchargement actif, erreur à relancer)
+            c.execute("""
+                SELECT t.id,
+                       td.id IS NULL,
+                       o.status IS NOT t.status,
+                       t.status IN ('downloading', 'queued', 'magnet_conversion'),
+                       td.status = 'error'
+                FROM torrents t
+                LEFT JOIN old_status o ON o.id = t.id
+                LEFT JOIN torrent_details td ON td.id = t.id
+                WHERE td.id IS NULL
+                   OR o.status IS NOT t.status
+                   OR t.status IN ('downloading', 'queued', 'magnet_conversion')
+                   OR td.status = 'error'
+            """)
+            rows = c.fetchall()
+        c.execute("DROP TABLE temp.old_status")
+    
+    torrent_ids_list = [row[0] for row in rows]
+    new_count = sum(1 for row in rows if row[1])
+    changed_count = sum(1 for row in rows if row[2])
+    active_count = sum(1 for row in rows if row[3])
+    error_count = sum(1 for row in rows if row[4])
     
     # Affichage du résumé des changements détectés
     logging.info("📊 Changements détectés :")
-    log_event('SYNC_ANALYSIS', new=len(new_torrents), status_changed=len(status_changed), active=len(active_downloads), errors=len(error_torrents))
-    logging.info(f"   🆕 Nouveaux torrents sans détails : {len(new_torrents)}")
-    logging.info(f"   🔄 Changements de statut : {len(status_changed)}")
-    logging.info(f"   ⬇️  Téléchargements actifs : {len(active_downloads)}")
-    logging.info(f"   ❌ Torrents en erreur (retry) : {len(error_torrents)}")
-    
-    torrent_ids_list = list(torrents_needing_details)
+    log_event('SYNC_ANALYSIS', new=new_count, status_changed=changed_count, active=active_count, errors=error_count)
+    logging.info(f"   🆕 Nouveaux torrents sans détails : {new_count}")
+    logging.info(f"   🔄 Changements de statut : {changed_count}")
+    logging.info(f"   ⬇️  Téléchargements actifs : {active_count}")
+    logging.info(f"   ❌ Torrents en erreur (retry) : {error_count}")
     
     if not torrent_ids_list:
         logging.info("✅ Aucun changement détecté, tous les détails sont à jour !")
         log_event('SYNC_PHASE_END', mode='smart', phase=2, status='no_changes')
+        refresh_stats_cache()
         log_event('SYNC_END', mode='smart', status='success', changes=0, duration=f"{time.time()-start_overall:.2f}s")
         return
     
@@ -1097,24 +1801,28 @@ def sync_smart(token):
     logging.info("🔍 [PHASE 3] Récupération ciblée des détails par IDs...")
     log_event('SYNC_PHASE_START', mode='smart', phase=3, name='details_fetch', targets=len(torrent_ids_list))
     
-    # Traiter les mises à jour avec mesure du temps
-    start_time = time.time()
-    processed = asyncio.run(fetch_all_torrent_details_v2(token, torrent_ids_list))
-    end_time = time.time()
-    
-    # Statistiques finales
-    duration = end_time - start_time
-    rate = processed / duration if duration > 0 else 0
-    
-    logging.info(f"✅ Synchronisation intelligente terminée !")
-    logging.info(f"   📊 Phase 1 : {total_torrents} statuts mis à jour")
-    logging.info(f"   📊 Phase 3 : {processed} détails mis à jour en {duration:.1f}s ({rate:.1f}/s)")
-    log_event('SYNC_PHASE_END', mode='smart', phase=3, processed=processed, duration=f"{duration:.2f}s", rate=f"{rate:.2f}/s")
-    
-    # Étape 4: Nettoyage des torrents obsolètes
-    logging.info("🧹 [PHASE 4] Nettoyage des torrents obsolètes...")
-    log_event('SYNC_PHASE_START', mode='smart', phase=4, name='cleanup')
-    cleaned_count = clean_obsolete_torrents(token)
+    async def details_then_cleanup():
+        """Phases 3 et 4 sur la même boucle : la session HTTP reste chaude"""
+        # Traiter les mises à jour avec mesure du temps
+        start_time = time.time()
+        processed = await fetch_all_torrent_details_v2(token, torrent_ids_list)
+        end_time = time.time()
+        
+        # Statistiques finales
+        duration = end_time - start_time
+        rate = processed / duration if duration > 0 else 0
+        
+        logging.info(f"✅ Synchronisation intelligente terminée !")
+        logging.info(f"   📊 Phase 1 : {total_torrents} statuts mis à jour")
+        logging.info(f"   📊 Phase 3 : {processed} détails mis à jour en {duration:.1f}s ({rate:.1f}/s)")
+        log_event('SYNC_PHASE_END', mode='smart', phase=3, processed=processed, duration=f"{duration:.2f}s", rate=f"{rate:.2f}/s")
+        
+        # Étape 4: Nettoyage des torrents obsolètes
+        logging.info("🧹 [PHASE 4] Nettoyage des torrents obsolètes...")
+        log_event('SYNC_PHASE_START', mode='smart', phase=4, name='cleanup')
+        return processed, duration, await clean_obsolete_torrents_async(token)
+    
+    processed, duration, cleaned_count = run_async(details_then_cleanup())
     if cleaned_count > 0:
         logging.info(f"🗑️ Supprimé {cleaned_count} torrents obsolètes de la base locale")
         print(f"🧹 Nettoyage terminé: {cleaned_count} torrents obsolètes supprimés")
@@ -1122,6 +1830,7 @@ def sync_smart(token):
         logging.info("✅ Aucun torrent obsolète trouvé")
     log_event('SYNC_PHASE_END', mode='smart', phase=4, cleaned=cleaned_count, status='success')
 
+    refresh_stats_cache()
     total_duration = time.time() - start_overall
     log_event('SYNC_END', mode='smart', status='success', torrents=total_torrents, details=processed, cleaned=cleaned_count, duration=f"{total_duration:.2f}s", rate=f"{processed/ (duration if duration>0 else 1):.2f}/s")
     
@@ -1141,18 +1850,24 @@ def sync_resume(token):
     logging.info("⏮️  Reprise de synchronisation...")
     log_event('SYNC_START', mode='resume')
     
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        c.execute("SELECT id FROM torrents")
-        all_ids = [row[0] for row in c.fetchall()]
+    with db_conn(readonly=True) as conn:
+        total_ids = conn.execute("SELECT COUNT(*) FROM torrents").fetchone()[0]
     
-    processed = asyncio.run(fetch_all_torrent_details_v2(token, all_ids, resumable=True))
-    logging.info(f"✅ Reprise terminée ! {processed} détails traités")
-    log_event('SYNC_PART', mode='resume', details_processed=processed)
+    async def details_then_cleanup():
+        """Détails puis nettoyage sur la même boucle (session HTTP partagée)"""
+        # IDs lus par pages au fil de la consommation (aucune lecture ouverte
+        # pendant les requêtes API)
+        processed = await fetch_all_torrent_details_v2(
+            token, iter_ids("SELECT id FROM torrents"), resumable=True, total=total_ids
+        )
+        logging.info(f"✅ Reprise terminée ! {processed} détails traités")
+        log_event('SYNC_PART', mode='resume', details_processed=processed)
+        
+        # Nettoyage des torrents obsolètes
+        logging.info("🧹 Nettoyage des torrents obsolètes...")
+        return processed, await clean_obsolete_torrents_async(token)
     
-    # Nettoyage des torrents obsolètes
-    logging.info("🧹 Nettoyage des torrents obsolètes...")
-    cleaned_count = clean_obsolete_torrents(token)
+    processed, cleaned_count = run_async(details_then_cleanup())
     if cleaned_count > 0:
         logging.info(f"🗑️ Supprimé {cleaned_count} torrents obsolètes de la base locale")
         print(f"🧹 Nettoyage terminé: {cleaned_count} torrents obsolètes supprimés")
@@ -1173,36 +1888,41 @@ def sync_details_only(token, status_filter=None):
         - python src/main.py --details-only
         - python src/main.py --details-only --status error
     """
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        query = "SELECT id FROM torrents"
-        params = ()
-        if status_filter:
-            query += " WHERE status = ?"
-            params = (status_filter,)
-        c.execute(query, params)
-        torrent_ids = [row[0] for row in c.fetchall()]
-    
-    if not torrent_ids:
+    where = ""
+    params = ()
+    if status_filter:
+        where = " WHERE status = ?"
+        params = (status_filter,)
+    with db_conn(readonly=True) as conn:
+        total_ids = conn.execute("SELECT COUNT(*) FROM torrents" + where, params).fetchone()[0]
+    
+    if not total_ids:
         logging.info("Aucun torrent trouvé pour synchronisation des détails.")
         log_event('SYNC_ABORT', mode='details_only', reason='no_torrents')
         return
         
     start_time = time.time()
-    logging.info(f"🔄 Synchronisation des détails pour {len(torrent_ids)} torrents...")
-    log_event('SYNC_START', mode='details_only', targets=len(torrent_ids), status_filter=status_filter or 'all')
-    processed = asyncio.run(fetch_all_torrent_details(token, torrent_ids))
-    logging.info(f"✅ Détails synchronisés pour {processed} torrents.")
-    log_event('SYNC_PART', mode='details_only', processed=processed)
-    
-    # Nettoyage des torrents obsolètes
-    logging.info("🧹 Nettoyage des torrents obsolètes...")
-    cleaned_count = clean_obsolete_torrents(token)
+    logging.info(f"🔄 Synchronisation des détails pour {total_ids} torrents...")
+    log_event('SYNC_START', mode='details_only', targets=total_ids, status_filter=status_filter or 'all')
+    async def details_then_cleanup():
+        """Détails puis nettoyage sur la même boucle (session HTTP partagée)"""
+        # IDs lus par pages au fil de la consommation (aucune lecture ouverte
+        # pendant les requêtes API ni les pauses entre lots)
+        processed = await fetch_all_torrent_details(token, iter_ids("SELECT id FROM torrents" + where, params))
+        logging.info(f"✅ Détails synchronisés pour {processed} torrents.")
+        log_event('SYNC_PART', mode='details_only', processed=processed)
+        
+        # Nettoyage des torrents obsolètes
+        logging.info("🧹 Nettoyage des torrents obsolètes...")
+        return processed, await clean_obsolete_torrents_async(token)
+    
+    processed, cleaned_count = run_async(details_then_cleanup())
     if cleaned_count > 0:
         logging.info(f"🗑️ Supprimé {cleaned_count} torrents obsolètes de la base locale")
         print(f"🧹 Nettoyage terminé: {cleaned_count} torrents obsolètes supprimés")
     else:
         logging.info("✅ Aucun torrent obsolète trouvé")
+    refresh_stats_cache()
     duration = time.time() - start_time
     log_event('SYNC_END', mode='details_only', status='success', processed=processed, cleaned=cleaned_count, duration=f"{duration:.2f}s")
 
@@ -1222,15 +1942,21 @@ def sync_torrents_only(token):
     logging.info("📋 Synchronisation des torrents de base uniquement...")
     log_event('SYNC_START', mode='torrents_only')
     
-    total = asyncio.run(fetch_all_torrents(token))
-    
-    if total > 0:
+    async def torrents_then_cleanup():
+        """Torrents puis nettoyage sur la même boucle (session HTTP partagée)"""
+        total, _ = await fetch_all_torrents(token)
+        if total <= 0:
+            return total, 0
         logging.info(f"✅ Synchronisation terminée ! {total} torrents enregistrés dans la table 'torrents'")
         log_event('SYNC_PART', mode='torrents_only', torrents=total)
         
         # Nettoyage des torrents obsolètes
         logging.info("🧹 Nettoyage des torrents obsolètes...")
-        cleaned_count = clean_obsolete_torrents(token)
+        return total, await clean_obsolete_torrents_async(token)
+    
+    total, cleaned_count = run_async(torrents_then_cleanup())
+    
+    if total > 0:
         if cleaned_count > 0:
             logging.info(f"🗑️ Supprimé {cleaned_count} torrents obsolètes de la base locale")
             print(f"🧹 Nettoyage terminé: {cleaned_count} torrents obsolètes supprimés")
@@ -1240,28 +1966,31 @@ def sync_torrents_only(token):
         log_event('SYNC_END', mode='torrents_only', status='success', torrents=total, cleaned=cleaned_count, duration=f"{duration:.2f}s")
         
         # Afficher un petit résumé
-        with sqlite3.connect(DB_PATH) as conn:
+        with db_conn(readonly=True) as conn:
             c = conn.cursor()
             c.execute("SELECT status, COUNT(*) FROM torrents GROUP BY status")
             status_counts = dict(c.fetchall())
             
             print(f"\n📊 Résumé des torrents synchronisés:")
             for status, count in status_counts.items():
-                emoji = get_status_emoji(status)
+                emoji = _STATUS_EMOJIS.get(status, '❓')
                 print(f"   {emoji} {status}: {count}")
     else:
         logging.info("ℹ️  Aucun torrent trouvé ou synchronisé")
         log_event('SYNC_ABORT', mode='torrents_only', reason='no_torrents')
 
-def clean_obsolete_torrents(token):
+async def clean_obsolete_torrents_async(token, session=None):
     """
     Nettoie les torrents qui existent localement mais qui ne sont plus présents côté Real-Debrid
     
     Cette fonction récupère la liste actuelle des torrents depuis Real-Debrid et supprime
-    de la base locale tous les torrents qui n'y figurent plus.
+    de la base locale tous les torrents qui n'y figurent plus. Version asynchrone, à
+    enchaîner dans la boucle de l'étape précédente pour réutiliser sa session HTTP.
     
     Args:
         token (str): Token d'authentification Real-Debrid
+        session (aiohttp.ClientSession, optional): Session à utiliser,
+            la session partagée par défaut
         
     Returns:
         int: Nombre de torrents supprimés
@@ -1272,39 +2001,59 @@ def clean_obsolete_torrents(token):
     current_rd_ids = set()
     headers = {"Authorization": f"Bearer {token}"}
     limit = 5000
+    session = session or _get_session()
     
     try:
-        import aiohttp
-        import asyncio
-        
         async def get_current_torrent_ids():
-            page = 1
-            async with aiohttp.ClientSession() as session:
-                while True:
-                    params = {"page": page, "limit": limit}
-                    try:
-                        torrents = await api_request(session, RD_API_URL, headers, params)
-                        if not torrents:
-                            break
-                        
-                        for t in torrents:
-                            current_rd_ids.add(t['id'])
-                        
-                        if len(torrents) < limit:
-                            break
-                            
-                        page += 1
-                        await asyncio.sleep(1)  # Pause entre pages
-                        
-                    except Exception as e:
-                        logging.error(f"Erreur lors de la récupération des IDs Real-Debrid: {e}")
-                        break
+            """
+            Remplit current_rd_ids ; pages 2..N en parallèle d'après X-Total-Count
+            
+            Returns:
+                bool: False si une page n'a pas pu être récupérée (None renvoyé
+                par api_request) ; seule une page vide ou incomplète termine la liste
+            """
+            semaphore = asyncio.Semaphore(PAGE_CONCURRENCY)
+            
+            async def fetch_page(page):
+                async with semaphore:
+                    return await api_request(session, RD_API_URL, headers, {"page": page, "limit": limit})
+            
+            torrents, resp_headers = await api_request(
+                session, RD_API_URL, headers, {"page": 1, "limit": limit}, return_headers=True
+            )
+            if torrents is None:
+                return False
+            if not torrents:
+                return True
+            current_rd_ids.update(t['id'] for t in torrents)
+            
+            pages = -(-safe_int(resp_headers.get('X-Total-Count')) // limit)
+            if pages > 1:
+                results = await asyncio.gather(*(fetch_page(p) for p in range(2, pages + 1)))
+                if not all(results):
+                    return False
+                for torrents in results:
+                    current_rd_ids.update(t['id'] for t in torrents)
+                return True
+            
+            # Sans header : pagination séquentielle jusqu'à une page incomplète
+            page = 2
+            while len(torrents) == limit and not pages:
+                torrents = await fetch_page(page)
+                if torrents is None:
+                    # Échec de requête : liste incomplète, pas de fin de pagination
+                    return False
+                if not torrents:
+                    break
+                current_rd_ids.update(t['id'] for t in torrents)
+                page += 1
+            return True
         
         # Exécuter la récupération
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(get_current_torrent_ids())
-        loop.close()
+        if not await get_current_torrent_ids() or stop_requested:
+            # Une liste partielle ferait supprimer des torrents encore présents
+            logging.warning("⚠️ Liste Real-Debrid incomplète, nettoyage annulé par sécurité")
+            return 0
         
         if not current_rd_ids:
             logging.warning("⚠️ Aucun torrent trouvé côté Real-Debrid, nettoyage annulé par sécurité")
@@ -1313,7 +2062,7 @@ def clean_obsolete_torrents(token):
         logging.info(f"✅ {len(current_rd_ids)} torrents trouvés côté Real-Debrid")
         
         # Récupérer tous les IDs locaux
-        with sqlite3.connect(DB_PATH) as conn:
+        with db_conn(readonly=True) as conn:
             c = conn.cursor()
             c.execute("SELECT id FROM torrents")
             local_ids = {row[0] for row in c.fetchall()}
@@ -1327,17 +2076,18 @@ def clean_obsolete_torrents(token):
         
         logging.info(f"🗑️ {len(obsolete_ids)} torrents obsolètes détectés")
         
-        # Supprimer les torrents obsolètes des deux tables
-        with sqlite3.connect(DB_PATH) as conn:
+        # Supprimer les torrents obsolètes des deux tables (une transaction,
+        # requête préparée une fois, recherche par clé primaire pour chaque ID)
+        with db_conn() as conn:
             c = conn.cursor()
+            c.execute("BEGIN IMMEDIATE")
             
             # Supprimer de torrents
-            placeholders = ','.join('?' * len(obsolete_ids))
-            c.execute(f"DELETE FROM torrents WHERE id IN ({placeholders})", list(obsolete_ids))
+            c.executemany("DELETE FROM torrents WHERE id = ?", ((i,) for i in obsolete_ids))
             torrents_deleted = c.rowcount
             
             # Supprimer de torrent_details
-            c.execute(f"DELETE FROM torrent_details WHERE id IN ({placeholders})", list(obsolete_ids))
+            c.executemany("DELETE FROM torrent_details WHERE id = ?", ((i,) for i in obsolete_ids))
             details_deleted = c.rowcount
             
             conn.commit()
@@ -1349,6 +2099,18 @@ def clean_obsolete_torrents(token):
         logging.error(f"❌ Erreur lors du nettoyage des torrents obsolètes: {e}")
         return 0
 
+def clean_obsolete_torrents(token):
+    """
+    Version synchrone de clean_obsolete_torrents_async (boucle dédiée)
+    
+    Args:
+        token (str): Token d'authentification Real-Debrid
+        
+    Returns:
+        int: Nombre de torrents supprimés
+    """
+    return run_async(clean_obsolete_torrents_async(token))
+
 def sync_all_v2(token):
     """
     Synchronisation complète optimisée (SYNC RAPIDE)
@@ -1367,7 +2129,7 @@ def sync_all_v2(token):
     
     # Étape 1: Synchroniser tous les torrents de base
     logging.info("📥 Étape 1/2: Récupération des torrents de base...")
-    total_torrents = asyncio.run(fetch_all_torrents(token))
+    total_torrents, _ = run_async(fetch_all_torrents(token))
     
     if total_torrents == 0:
         logging.warning("⚠️ Aucun torrent trouvé")
@@ -1380,63 +2142,89 @@ def sync_all_v2(token):
     # Étape 2: Récupérer tous les détails manquants
     logging.info("📋 Étape 2/2: Récupération des détails...")
     
-    with sqlite3.connect(DB_PATH) as conn:
-        c = conn.cursor()
-        c.execute("SELECT id FROM torrents WHERE id NOT IN (SELECT id FROM torrent_details)")
-        missing_ids = [row[0] for row in c.fetchall()]
-    
-    if missing_ids:
-        logging.info(f"🔄 Récupération des détails pour {len(missing_ids)} torrents...")
-        log_event('SYNC_PART', mode='fast', missing_details=len(missing_ids))
-        processed = asyncio.run(fetch_all_torrent_details_v2(token, missing_ids))
-        logging.info(f"✅ Détails récupérés pour {processed} torrents")
-        print(f"🚀 Synchronisation complète terminée: {total_torrents} torrents, {processed} détails")
-        log_event('SYNC_PART', mode='fast', details_processed=processed)
-    else:
-        logging.info("✅ Tous les détails sont déjà à jour")
-        print(f"🚀 Synchronisation complète terminée: {total_torrents} torrents, tous les détails à jour")
-        log_event('SYNC_PART', mode='fast', missing_details=0)
+    # Anti-jointure sur la clé primaire de torrent_details (pas d'index supplémentaire)
+    missing_sql = """
+        SELECT t.id FROM torrents t
+        LEFT JOIN torrent_details td ON td.id = t.id
+        WHERE td.id IS NULL
+    """
+    with db_conn(readonly=True) as conn:
+        missing_count = conn.execute(f"SELECT COUNT(*) FROM ({missing_sql})").fetchone()[0]
+    
+    async def details_then_cleanup():
+        """Étapes 2 et 3 sur la même boucle (session HTTP partagée)"""
+        if missing_count:
+            logging.info(f"🔄 Récupération des détails pour {missing_count} torrents...")
+            log_event('SYNC_PART', mode='fast', missing_details=missing_count)
+            # Anti-jointure relue par pages de clés (id > dernier ID lu) : aucun
+            # curseur ouvert pendant que l'écrivain insère dans torrent_details,
+            # et les lignes déjà traitées restent derrière la clé courante
+            processed = await fetch_all_torrent_details_v2(token, iter_ids(missing_sql), total=missing_count)
+            logging.info(f"✅ Détails récupérés pour {processed} torrents")
+            print(f"🚀 Synchronisation complète terminée: {total_torrents} torrents, {processed} détails")
+            log_event('SYNC_PART', mode='fast', details_processed=processed)
+        else:
+            logging.info("✅ Tous les détails sont déjà à jour")
+            print(f"🚀 Synchronisation complète terminée: {total_torrents} torrents, tous les détails à jour")
+            log_event('SYNC_PART', mode='fast', missing_details=0)
+        
+        # Étape 3: Nettoyage des torrents obsolètes
+        logging.info("🧹 Étape 3/3: Nettoyage des torrents obsolètes...")
+        return await clean_obsolete_torrents_async(token)
     
-    # Étape 3: Nettoyage des torrents obsolètes
-    logging.info("🧹 Étape 3/3: Nettoyage des torrents obsolètes...")
-    cleaned_count = clean_obsolete_torrents(token)
+    cleaned_count = run_async(details_then_cleanup())
     if cleaned_count > 0:
         logging.info(f"🗑️ Supprimé {cleaned_count} torrents obsolètes de la base locale")
         print(f"🧹 Nettoyage terminé: {cleaned_count} torrents obsolètes supprimés")
     else:
         logging.info("✅ Aucun torrent obsolète trouvé")
+    refresh_stats_cache()
     duration = time.time() - start_time
     log_event('SYNC_END', mode='fast', status='success', torrents=total_torrents, cleaned=cleaned_count, duration=f"{duration:.2f}s")
     
     display_final_summary()
 
-async def fetch_all_torrent_details(token, torrent_ids, max_concurrent=MAX_CONCURRENT):
+async def fetch_all_torrent_details(token, torrent_ids, max_concurrent=MAX_CONCURRENT, session=None):
     """
     Version classique de récupération des détails (pour compatibilité)
     
     Args:
         token (str): Token Real-Debrid
-        torrent_ids (list): IDs des torrents à traiter
+        torrent_ids (iterable): IDs des torrents à traiter (liste ou générateur),
+            parcourus jusqu'à épuisement
         max_concurrent (int): Nombre de requêtes simultanées
+        session (aiohttp.ClientSession, optional): Session à utiliser,
+            la session partagée par défaut
         
     Returns:
         int: Nombre de détails traités
     """
     semaphore = asyncio.Semaphore(max_concurrent)
     total_processed = 0
+    ids = iter(torrent_ids)
     
-    async with aiohttp.ClientSession() as session:
-        async def process_torrent(tid):
-            async with semaphore:
-                return await fetch_torrent_detail(session, token, tid)
-        
-        # Traitement par batch pour respecter les quotas
-        for i in range(0, len(torrent_ids), BATCH_SIZE):
+    # Session HTTP partagée (keep-alive et cache DNS réutilisés)
+    session = session or _get_session()
+    
+    # Écrivain unique : détails écrits par lots, hors du chemin des requêtes
+    writer = DbWriter()
+    writer.start()
+    
+    async def process_torrent(tid):
+        async with semaphore:
+            return await fetch_torrent_detail(session, token, tid, writer)
+    
+    try:
+        # Traitement par batch pour respecter les quotas, jusqu'à épuisement
+        # des IDs (et non du total compté au départ)
+        batch_ids = list(itertools.islice(ids, BATCH_SIZE))
+        batch_num = 0
+        while batch_ids:
             if stop_requested:
                 logging.info("Arrêt demandé, interruption de la récupération des détails.")
                 break
-                
-            batch_ids = torrent_ids[i:i+BATCH_SIZE]
+            
+            batch_num += 1
             tasks = [process_torrent(tid) for tid in batch_ids]
             batch_results = await asyncio.gather(*tasks, return_exceptions=True)
             
@@ -1444,15 +2232,38 @@ async def fetch_all_torrent_details(token, torrent_ids, max_concurrent=MAX_CONCU
             successful = sum(1 for r in batch_results if r and not isinstance(r, Exception))
             total_processed += successful
             
-            logging.info(f"Batch {i//BATCH_SIZE + 1}: {successful}/{len(batch_ids)} détails récupérés")
+            logging.info(f"Batch {batch_num}: {successful}/{len(batch_ids)} détails récupérés")
             
             # Pause entre les batches sauf pour le dernier
-            if i + BATCH_SIZE < len(torrent_ids):
+            batch_ids = list(itertools.islice(ids, BATCH_SIZE))
+            if batch_ids:
                 logging.info(f"Pause {QUOTA_WAIT_TIME}s avant le prochain batch...")
                 await asyncio.sleep(QUOTA_WAIT_TIME)
+    finally:
+        await writer.close()
     
     return total_processed
 
+_SQL_FINAL_SUMMARY = """
+    WITH totals AS (
+        SELECT (SELECT COUNT(*) FROM torrents),
+               (SELECT COUNT(*) FROM torrent_details),
+               (SELECT COUNT(*) FROM torrents
+                WHERE added_on >= strftime('%Y-%m-%dT%H:%M:%S', 'now', '-1 day'))
+    ),
+    top_status AS (
+        SELECT status, COUNT(*) AS count
+        FROM torrent_details
+        WHERE status IS NOT NULL
+        GROUP BY status
+        ORDER BY count DESC
+        LIMIT 5
+    )
+    SELECT totals.*, top_status.status, top_status.count
+    FROM totals LEFT JOIN top_status
+    ORDER BY top_status.count DESC
+"""
+
 def display_final_summary():
     """
     Affiche un résumé final après synchronisation avec recommandations
@@ -1464,33 +2275,16 @@ def display_final_summary():
     - Recommandations d'actions
     """
     try:
-        with sqlite3.connect(DB_PATH) as conn:
+        with db_conn(readonly=True) as conn:
             c = conn.cursor()
             
-            # Statistiques générales
-            c.execute("SELECT COUNT(*) FROM torrents")
-            total_torrents = c.fetchone()[0]
-            
-            c.execute("SELECT COUNT(*) FROM torrent_details")
-            total_details = c.fetchone()[0]
-            
-            # Répartition par statut (top 5) - CORRIGER: utiliser seulement torrent_details
-            c.execute("""
-                SELECT td.status, COUNT(*) as count
-                FROM torrent_details td
-                WHERE td.status IS NOT NULL
-                GROUP BY td.status
-                ORDER BY count DESC
-                LIMIT 5
-            """)
-            status_counts = c.fetchall()
-            
-            # Torrents récents (dernières 24h)
-            c.execute("""
-                SELECT COUNT(*) FROM torrents 
-                WHERE datetime('now') - datetime(added_on) < 1
-            """)
-            recent_count = c.fetchone()[0]
+            # Statistiques générales, torrents récents (dernières 24h) et
+            # top 5 des statuts (torrent_details seulement) en une requête :
+            # une ligne par statut, les totaux répétés sur chaque ligne
+            c.execute(_SQL_FINAL_SUMMARY)
+            rows = c.fetchall()
+            total_torrents, total_details, recent_count = rows[0][:3]
+            status_counts = [(status, count) for *_, status, count in rows if status is not None]
             
             print(f"\n📊 Résumé de la base de données :")
             print(f"   📂 Total torrents : {total_torrents}")
@@ -1501,7 +2295,7 @@ def display_final_summary():
                 print(f"\n📈 Top 5 des statuts :")
                 for status, count in status_counts:
                     percentage = 100 * count / total_torrents if total_torrents > 0 else 0
-                    emoji = get_status_emoji(status)
+                    emoji = _STATUS_EMOJIS.get(status, '❓')
                     print(f"   {emoji} {status} : {count} ({percentage:.1f}%)")
                     
     except Exception as e:
@@ -1511,6 +2305,113 @@ def display_final_summary():
 # ║                      SECTION 6: STATISTIQUES ET ANALYTICS                 ║
 # ╚════════════════════════════════════════════════════════════════════════════╝
 
+# Agrégats de --stats : un parcours de chaque table, regroupés en une requête
+_SQL_STATS_TOTALS = """
+    WITH t AS (
+        SELECT COUNT(*),
+               SUM(CASE WHEN bytes > 0 THEN bytes END),
+               MIN(CASE WHEN bytes > 0 THEN bytes END),
+               MAX(CASE WHEN bytes > 0 THEN bytes END),
+               SUM(added_on >= strftime('%Y-%m-%dT%H:%M:%S', 'now', '-24 hours')),
+               SUM(added_on >= strftime('%Y-%m-%dT%H:%M:%S', 'now', '-7 days'))
+        FROM torrents
+    ),
+    d AS (
+        SELECT COUNT(*),
+               SUM(status = 'error' OR error IS NOT NULL),
+               SUM(status IN ('downloading', 'queued', 'waiting_files_selection')),
+               AVG(progress)
+        FROM torrent_details
+    )
+    SELECT t.*, d.*,
+           (SELECT COUNT(*) FROM torrents t
+            WHERE NOT EXISTS (SELECT 1 FROM torrent_details td WHERE td.id = t.id))
+    FROM t, d
+"""
+
+# Troncature des noms affichés : largeur maximale, points de suspension inclus
+_NAME_WIDTH = 48
+_ELLIPSIS = "…"
+
+# Répartition par statut de --stats (top 8, pourcentage du total de torrents)
+_SQL_STATUS_BREAKDOWN = """
+    SELECT status, COUNT(*), COALESCE(COUNT(*) * 1.0 / NULLIF(?, 0) * 100, 0)
+    FROM torrent_details
+    WHERE status IS NOT NULL
+    GROUP BY status
+    ORDER BY COUNT(*) DESC
+    LIMIT 8
+"""
+
+# Tops de --stats, mis en cache dans stats_cache pour une génération des données
+_SQL_TOP_HOSTS = """
+    SELECT host, COUNT(*) as count 
+    FROM torrent_details 
+    WHERE host IS NOT NULL AND host != ''
+    GROUP BY host 
+    ORDER BY count DESC 
+    LIMIT 5
+"""
+
+_SQL_BIGGEST_TORRENTS = """
+    SELECT name, size, status 
+    FROM torrent_details 
+    WHERE size > 0 AND name IS NOT NULL
+    ORDER BY size DESC 
+    LIMIT 5
+"""
+
+# Génération courante de torrent_details (incrémentée par triggers)
+_SQL_DATA_GENERATION = "SELECT gen FROM data_generation WHERE id = 0"
+
+def refresh_stats_cache():
+    """
+    Recalcule les tops de --stats si le cache ne correspond plus aux données
+    
+    Le cache est marqué avec la génération de data_generation, lue dans la
+    même transaction (BEGIN IMMEDIATE) que les tops : il reste valide jusqu'à
+    la prochaine écriture dans torrent_details, quel que soit le délai écoulé.
+    Appelée en fin de synchronisation ; --stats ne fait que lire le cache.
+    """
+    try:
+        with db_conn() as conn:
+            c = conn.cursor()
+            # Verrou d'écriture pris d'emblée : génération et tops proviennent
+            # du même état de la base
+            c.execute("BEGIN IMMEDIATE")
+            gen = c.execute(_SQL_DATA_GENERATION).fetchone()[0]
+            c.execute("SELECT COUNT(*) FROM stats_cache WHERE k IN ('top_hosts', 'biggest') AND gen = ?", (gen,))
+            if c.fetchone()[0] == 2:
+                return
+            top_hosts = c.execute(_SQL_TOP_HOSTS).fetchall()
+            biggest = c.execute(_SQL_BIGGEST_TORRENTS).fetchall()
+            c.executemany("INSERT OR REPLACE INTO stats_cache (k, v, gen) VALUES (?, ?, ?)", [
+                ('top_hosts', json.dumps(top_hosts), gen),
+                ('biggest', json.dumps(biggest), gen),
+            ])
+    except sqlite3.OperationalError as e:
+        # Base verrouillée par un écrivain : --stats calculera les tops en direct
+        logging.debug(f"Cache des statistiques non rafraîchi : {e}")
+
+def _cached_stats(c, key, sql):
+    """
+    Lit un agrégat depuis stats_cache, ou l'exécute en direct si le cache est
+    périmé (écritures depuis la dernière fin de synchronisation)
+    
+    Args:
+        c (sqlite3.Cursor): Curseur ouvert
+        key (str): Clé de l'agrégat dans stats_cache
+        sql (str): Requête de repli, exécutée en direct
+        
+    Returns:
+        list: Lignes de l'agrégat (tuples)
+    """
+    c.execute(f"SELECT v FROM stats_cache WHERE k = ? AND gen = ({_SQL_DATA_GENERATION})", (key,))
+    row = c.fetchone()
+    if row:
+        return [tuple(r) for r in json.loads(row[0])]
+    return c.execute(sql).fetchall()
+
 def show_stats():
     """
     Affiche des statistiques complètes et détaillées de votre collection
@@ -1527,154 +2428,115 @@ def show_stats():
     
     Usage: python src/main.py --stats
     """
-    with sqlite3.connect(DB_PATH) as conn:
+    with db_conn(readonly=True) as conn:
         c = conn.cursor()
-        
-        # === STATISTIQUES GÉNÉRALES ===
-        c.execute("SELECT COUNT(*) FROM torrents")
-        total_torrents = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM torrent_details")
-        total_details = c.fetchone()[0]
+        # Transaction de lecture : un seul verrou partagé et un instantané
+        # cohérent pour toutes les requêtes (terminée en sortie de db_conn)
+        c.execute("BEGIN")
+        
+        # === COMPTEURS ET AGRÉGATS (un seul aller-retour) ===
+        c.execute(_SQL_STATS_TOTALS)
+        (total_torrents, total_size, min_size, max_size, recent_24h, recent_7d,
+         total_details, error_count, active_count, avg_progress, missing_details) = c.fetchone()
+        total_size, min_size, max_size = (total_size, min_size, max_size) if total_size else (0, 0, 0)
+        recent_24h = recent_24h or 0
+        recent_7d = recent_7d or 0
+        error_count = error_count or 0
+        active_count = active_count or 0
+        avg_progress = avg_progress or 0
+        missing_details = missing_details or 0
         
         coverage_percent = (total_details / total_torrents * 100) if total_torrents > 0 else 0
         
-        # === RÉPARTITION PAR STATUT ===
-        c.execute("SELECT status, COUNT(*) FROM torrent_details WHERE status IS NOT NULL GROUP BY status ORDER BY COUNT(*) DESC")
+        # === RÉPARTITION PAR STATUT (top 8, pourcentage calculé par SQLite) ===
+        c.execute(_SQL_STATUS_BREAKDOWN, (total_torrents,))
         torrent_status = c.fetchall()
         
-        c.execute("SELECT status, COUNT(*) FROM torrent_details GROUP BY status ORDER BY COUNT(*) DESC")
-        detail_status = c.fetchall()
-        
-        # === TAILLES ET VOLUMES ===
-        c.execute("SELECT SUM(bytes), MIN(bytes), MAX(bytes) FROM torrents WHERE bytes > 0")
-        size_stats = c.fetchone()
-        total_size, min_size, max_size = size_stats if size_stats and size_stats[0] else (0, 0, 0)
-        
-        # === ACTIVITÉ RÉCENTE ===
-        c.execute("""
-            SELECT COUNT(*) FROM torrents 
-            WHERE datetime(added_on) >= datetime('now', '-24 hours')
-        """)
-        recent_24h = c.fetchone()[0] or 0
-        
-        c.execute("""
-            SELECT COUNT(*) FROM torrents 
-            WHERE datetime(added_on) >= datetime('now', '-7 days')
-        """)
-        recent_7d = c.fetchone()[0] or 0
-        
-        # === TORRENTS PROBLÉMATIQUES ===
-        c.execute("SELECT COUNT(*) FROM torrent_details WHERE status = 'error' OR error IS NOT NULL")
-        error_count = c.fetchone()[0] or 0
-        
-        c.execute("SELECT COUNT(*) FROM torrent_details WHERE status IN ('downloading', 'queued', 'waiting_files_selection')")
-        active_count = c.fetchone()[0] or 0
-        
-        # === TORRENTS SANS DÉTAILS ===
-        c.execute("""
-            SELECT COUNT(*) FROM torrents t 
-            LEFT JOIN torrent_details td ON t.id = td.id 
-            WHERE td.id IS NULL
-        """)
-        missing_details = c.fetchone()[0] or 0
-        
-        # === TOP HÉBERGEURS ===
-        c.execute("""
-            SELECT host, COUNT(*) as count 
-            FROM torrent_details 
-            WHERE host IS NOT NULL AND host != ''
-            GROUP BY host 
-            ORDER BY count DESC 
-            LIMIT 5
-        """)
-        top_hosts = c.fetchall()
-        
-        # === TORRENTS LES PLUS GROS ===
-        c.execute("""
-            SELECT name, size, status 
-            FROM torrent_details 
-            WHERE size > 0 AND name IS NOT NULL
-            ORDER BY size DESC 
-            LIMIT 5
-        """)
-        biggest_torrents = c.fetchall()
-        
-        # === PROGRESSION MOYENNE ===
-        c.execute("SELECT AVG(progress) FROM torrent_details WHERE progress IS NOT NULL")
-        avg_progress = c.fetchone()[0] or 0
-        
-        # === AFFICHAGE FORMATÉ ===
-        print("\n" + "="*60)
-        print("📊 STATISTIQUES COMPLÈTES REDRIVA")
-        print("="*60)
+        # === TOP HÉBERGEURS ET TORRENTS LES PLUS GROS (cache par génération) ===
+        top_hosts = _cached_stats(c, 'top_hosts', _SQL_TOP_HOSTS)
+        biggest_torrents = _cached_stats(c, 'biggest', _SQL_BIGGEST_TORRENTS)
+        
+        # === AFFICHAGE FORMATÉ (rapport assemblé puis écrit en une fois) ===
+        out = []
+        out.append("\n" + "="*60)
+        out.append("📊 STATISTIQUES COMPLÈTES REDRIVA")
+        out.append("="*60)
         
         # Vue d'ensemble
-        print(f"\n🗂️  VUE D'ENSEMBLE")
-        print(f"   📁 Total torrents     : {total_torrents:,}")
-        print(f"   📋 Détails disponibles: {total_details:,}")
-        print(f"   📊 Couverture         : {coverage_percent:.1f}%")
-        print(f"   ❌ Détails manquants  : {missing_details:,}")
+        out.append(f"\n🗂️  VUE D'ENSEMBLE")
+        out.append(f"   📁 Total torrents     : {total_torrents:,}")
+        out.append(f"   📋 Détails disponibles: {total_details:,}")
+        out.append(f"   📊 Couverture         : {coverage_percent:.1f}%")
+        out.append(f"   ❌ Détails manquants  : {missing_details:,}")
         
         # Volumes de données
         if total_size and total_size > 0:
-            print(f"\n💾 VOLUMES DE DONNÉES")
-            print(f"   📦 Volume total       : {format_size(total_size)}")
-            print(f"    Plus petit         : {format_size(min_size) if min_size else 'N/A'}")
-            print(f"   🔺 Plus gros          : {format_size(max_size) if max_size else 'N/A'}")
+            out.append(f"\n💾 VOLUMES DE DONNÉES")
+            out.append(f"   📦 Volume total       : {format_size(total_size)}")
+            out.append(f"    Plus petit         : {format_size(min_size) if min_size else 'N/A'}")
+            out.append(f"   🔺 Plus gros          : {format_size(max_size) if max_size else 'N/A'}")
         
         # Activité récente
-        print(f"\n⏰ ACTIVITÉ RÉCENTE")
-        print(f"   🆕 Dernières 24h      : {recent_24h:,} torrents")
-        print(f"   📅 Derniers 7 jours   : {recent_7d:,} torrents")
+        out.append(f"\n⏰ ACTIVITÉ RÉCENTE")
+        out.append(f"   🆕 Dernières 24h      : {recent_24h:,} torrents")
+        out.append(f"   📅 Derniers 7 jours   : {recent_7d:,} torrents")
         
         # État des téléchargements
-        print(f"\n🔄 ÉTAT DES TÉLÉCHARGEMENTS")
-        print(f"   ✅ Progression moyenne: {avg_progress:.1f}%")
-        print(f"   ⬇️  Téléchargements    : {active_count:,}")
-        print(f"   ❌ Erreurs            : {error_count:,}")
+        out.append(f"\n🔄 ÉTAT DES TÉLÉCHARGEMENTS")
+        out.append(f"   ✅ Progression moyenne: {avg_progress:.1f}%")
+        out.append(f"   ⬇️  Téléchargements    : {active_count:,}")
+        out.append(f"   ❌ Erreurs            : {error_count:,}")
         
         # Répartition par statut (torrents)
         if torrent_status:
-            print(f"\n📈 RÉPARTITION PAR STATUT")
-            for status, count in torrent_status[:8]:  # Top 8
-                percent = (count / total_torrents * 100) if total_torrents > 0 else 0
-                status_emoji = get_status_emoji(status)
-                print(f"   {status_emoji} {status:<15} : {count:,} ({percent:.1f}%)")
+            out.append(f"\n📈 RÉPARTITION PAR STATUT")
+            for status, count, percent in torrent_status:
+                status_emoji = _STATUS_EMOJIS.get(status, '❓')
+                out.append(f"   {status_emoji} {status:<15} : {count:,} ({percent:.1f}%)")
         
         # Top hébergeurs
         if top_hosts:
-            print(f"\n🌐 TOP HÉBERGEURS")
+            out.append(f"\n🌐 TOP HÉBERGEURS")
             for host, count in top_hosts:
                 percent = (count / total_details * 100) if total_details > 0 else 0
-                print(f"   🔗 {host:<15} : {count:,} ({percent:.1f}%)")
+                out.append(f"   🔗 {host:<15} : {count:,} ({percent:.1f}%)")
         
         # Plus gros torrents
         if biggest_torrents:
-            print(f"\n🏆 TOP 5 PLUS GROS TORRENTS")
+            out.append(f"\n🏆 TOP 5 PLUS GROS TORRENTS")
             for i, (name, size, status) in enumerate(biggest_torrents, 1):
-                status_emoji = get_status_emoji(status)
-                truncated_name = (name[:45] + "...") if len(name) > 48 else name
-                print(f"   {i}. {status_emoji} {format_size(size)} - {truncated_name}")
+                status_emoji = _STATUS_EMOJIS.get(status, '❓')
+                truncated_name = name if len(name) <= _NAME_WIDTH else name[:_NAME_WIDTH - 1] + _ELLIPSIS
+                out.append(f"   {i}. {status_emoji} {format_size(size)} - {truncated_name}")
         
         # Recommandations automatiques
-        print(f"\n💡 RECOMMANDATIONS")
+        out.append(f"\n💡 RECOMMANDATIONS")
         if missing_details > 0:
-            print(f"   🔧 Exécuter: python src/main.py --sync-smart")
-            print(f"      (pour récupérer {missing_details:,} détails manquants)")
+            out.append(f"   🔧 Exécuter: python src/main.py --sync-smart")
+            out.append(f"      (pour récupérer {missing_details:,} détails manquants)")
         
         if error_count > 0:
-            print(f"   🔄 Exécuter: python src/main.py --details-only --status error")
-            print(f"      (pour retry {error_count:,} torrents en erreur)")
+            out.append(f"   🔄 Exécuter: python src/main.py --details-only --status error")
+            out.append(f"      (pour retry {error_count:,} torrents en erreur)")
         
         if active_count > 0:
-            print(f"   ⬇️  {active_count:,} téléchargements en cours")
-            print(f"      (utilisez --sync-smart pour les suivre)")
+            out.append(f"   ⬇️  {active_count:,} téléchargements en cours")
+            out.append(f"      (utilisez --sync-smart pour les suivre)")
         
         if missing_details == 0 and error_count == 0:
-            print(f"   ✅ Votre base est complète et à jour !")
+            out.append(f"   ✅ Votre base est complète et à jour !")
         
-        print("\n" + "="*60)
+        out.append("\n" + "="*60)
+        sys.stdout.write("\n".join(out) + "\n")
+
+# Compteurs de --stats --compact : torrents, détails, actifs, en erreur
+_SQL_COMPACT_STATS = f"""
+    SELECT (SELECT COUNT(*) FROM torrents),
+           (SELECT COUNT(*) FROM torrent_details),
+           (SELECT COUNT(*) FROM torrent_details WHERE status IN ({_ACTIVE_PH})),
+           (SELECT COUNT(*) FROM torrent_details WHERE status IN ({_ERROR_PH}))
+"""
+_COMPACT_STATS_PARAMS = (*ACTIVE_STATUSES, *ERROR_STATUSES)
 
 def show_stats_compact():
     """
@@ -1688,24 +2550,13 @@ def show_stats_compact():
     Usage: python src/main.py --stats --compact
     Exemple: 📊 4,233 torrents | 4,232 détails (100.0%) | ⬇️ 0 en cours | ❌ 2 erreurs
     """
-    with sqlite3.connect(DB_PATH) as conn:
+    with db_conn(readonly=True) as conn:
         c = conn.cursor()
         
-        c.execute("SELECT COUNT(*) FROM torrents")
-        total = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM torrent_details")
-        details = c.fetchone()[0]
-        
-        # Utilisation des constantes pour les torrents actifs
-        placeholders = ','.join('?' * len(ACTIVE_STATUSES))
-        c.execute(f"SELECT COUNT(*) FROM torrent_details WHERE status IN ({placeholders})", ACTIVE_STATUSES)
-        active = c.fetchone()[0] or 0
-        
-        # Utilisation des constantes pour les erreurs
-        placeholders = ','.join('?' * len(ERROR_STATUSES))
-        c.execute(f"SELECT COUNT(*) FROM torrent_details WHERE status IN ({placeholders})", ERROR_STATUSES)
-        errors = c.fetchone()[0] or 0
+        # Les 4 compteurs en un seul aller-retour (texte SQL constant : requête
+        # préparée réutilisée depuis le cache de la connexion)
+        c.execute(_SQL_COMPACT_STATS, _COMPACT_STATS_PARAMS)
+        total, details, active, errors = c.fetchone()
         
         coverage = (details / total * 100) if total > 0 else 0
         
@@ -1716,6 +2567,54 @@ def show_stats_compact():
 # ║                     SECTION 7: DIAGNOSTIC ET MAINTENANCE                  ║
 # ╚════════════════════════════════════════════════════════════════════════════╝
 
+# Mots-clés d'erreur compilés en une expression : un groupe par catégorie,
+# dans l'ordre de priorité (le premier groupe trouvé l'emporte)
+_ERROR_TYPE_RE = re.compile(
+    r'(?=(timeout|time out)|(404|not found)|(403|forbidden)|(500|502|503)'
+    r'|(quota|limit)|(connection)|(json|parse))',
+    re.IGNORECASE
+)
+_ERROR_TYPES = (
+    "⏱️ Timeout réseau (temporaire)",
+    "🔍 Torrent introuvable (supprimé de RD)",
+    "🚫 Accès refusé (problème d'autorisation)",
+    "🖥️ Erreur serveur Real-Debrid (temporaire)",
+    "📊 Quota API dépassé (temporaire)",
+    "🌐 Problème de connexion (temporaire)",
+    "📋 Données malformées (temporaire)",
+)
+
+_ERROR_SUGGESTION_RE = re.compile(
+    r'(?=(timeout|connection)|(404|not found)|(403)|(500|502)|(quota))',
+    re.IGNORECASE
+)
+_ERROR_SUGGESTIONS = (
+    "🔄 Retry automatique recommandé (erreur réseau temporaire)",
+    "🗑️ Torrent probablement supprimé - considérer suppression de la base",
+    "🔑 Vérifier la validité du token Real-Debrid",
+    "⏳ Attendre et retry plus tard (problème serveur RD)",
+    "⏰ Attendre la réinitialisation du quota (1 heure max)",
+)
+
+@functools.lru_cache(maxsize=4096)
+def _match_category(pattern, text):
+    """
+    Trouve la catégorie prioritaire dont un mot-clé apparaît dans le texte
+    
+    Le lookahead teste chaque position sans consommer de caractères : les
+    occurrences qui se chevauchent sont toutes vues en un seul parcours.
+    Résultat mémorisé par message : les torrents en erreur partagent
+    souvent le même texte d'erreur.
+    
+    Args:
+        pattern (re.Pattern): Expression à un groupe par catégorie
+        text (str): Texte à analyser
+        
+    Returns:
+        int/None: Index (0 = plus prioritaire) de la catégorie, ou None
+    """
+    return min((m.lastindex - 1 for m in pattern.finditer(text)), default=None)
+
 def analyze_error_type(error_msg, status):
     """
     Analyse automatique du type d'erreur basé sur le message d'erreur
@@ -1739,24 +2638,10 @@ def analyze_error_type(error_msg, status):
     if not error_msg:
         return "❓ Erreur inconnue (pas de message)"
     
-    error_lower = error_msg.lower()
-    
-    if "timeout" in error_lower or "time out" in error_lower:
-        return "⏱️ Timeout réseau (temporaire)"
-    elif "404" in error_lower or "not found" in error_lower:
-        return "🔍 Torrent introuvable (supprimé de RD)"
-    elif "403" in error_lower or "forbidden" in error_lower:
-        return "🚫 Accès refusé (problème d'autorisation)"
-    elif "500" in error_lower or "502" in error_lower or "503" in error_lower:
-        return "🖥️ Erreur serveur Real-Debrid (temporaire)"
-    elif "quota" in error_lower or "limit" in error_lower:
-        return "📊 Quota API dépassé (temporaire)"
-    elif "connection" in error_lower:
-        return "🌐 Problème de connexion (temporaire)"
-    elif "json" in error_lower or "parse" in error_lower:
-        return "📋 Données malformées (temporaire)"
-    else:
+    category = _match_category(_ERROR_TYPE_RE, error_msg)
+    if category is None:
         return f"❓ Erreur spécifique : {error_msg[:50]}..."
+    return _ERROR_TYPES[category]
 
 def get_error_suggestion(error_msg, status):
     """
@@ -1772,20 +2657,31 @@ def get_error_suggestion(error_msg, status):
     if not error_msg:
         return "🔄 Retry avec --sync-smart"
     
-    error_lower = error_msg.lower()
-    
-    if "timeout" in error_lower or "connection" in error_lower:
-        return "🔄 Retry automatique recommandé (erreur réseau temporaire)"
-    elif "404" in error_lower or "not found" in error_lower:
-        return "🗑️ Torrent probablement supprimé - considérer suppression de la base"
-    elif "403" in error_lower:
-        return "🔑 Vérifier la validité du token Real-Debrid"
-    elif "500" in error_lower or "502" in error_lower:
-        return "⏳ Attendre et retry plus tard (problème serveur RD)"
-    elif "quota" in error_lower:
-        return "⏰ Attendre la réinitialisation du quota (1 heure max)"
-    else:
+    category = _match_category(_ERROR_SUGGESTION_RE, error_msg)
+    if category is None:
         return "🔄 Retry avec --sync-smart ou --details-only --status error"
+    return _ERROR_SUGGESTIONS[category]
+
+# Torrents en erreur avec leurs détails, les plus récents d'abord ; le OR est
+# décomposé en deux branches indexées (idx_details_status_id, idx_details_error)
+# plutôt qu'un parcours complet de torrent_details. La seconde branche exclut
+# les lignes déjà retournées par la première (IS NOT garde les statuts NULL).
+_SQL_DIAGNOSE_ERRORS = """
+    SELECT * FROM (
+        SELECT td.id, td.name, td.status, td.error, td.progress,
+               t.filename, t.added_on, t.bytes
+        FROM torrent_details td
+        LEFT JOIN torrents t ON td.id = t.id
+        WHERE td.status = 'error'
+        UNION ALL
+        SELECT td.id, td.name, td.status, td.error, td.progress,
+               t.filename, t.added_on, t.bytes
+        FROM torrent_details td
+        LEFT JOIN torrents t ON td.id = t.id
+        WHERE td.error IS NOT NULL AND td.status IS NOT 'error'
+    )
+    ORDER BY added_on DESC
+"""
 
 def diagnose_errors():
     """
@@ -1800,63 +2696,61 @@ def diagnose_errors():
     
     Usage: python src/main.py --diagnose-errors
     """
-    with sqlite3.connect(DB_PATH) as conn:
+    with db_conn(readonly=True) as conn:
         c = conn.cursor()
         
         # Récupérer tous les torrents en erreur avec leurs détails
-        c.execute("""
-            SELECT td.id, td.name, td.status, td.error, td.progress, 
-                   t.filename, t.added_on, t.bytes
-            FROM torrent_details td
-            LEFT JOIN torrents t ON td.id = t.id
-            WHERE td.status = 'error' OR td.error IS NOT NULL
-            ORDER BY t.added_on DESC
-        """)
-        
-        errors = c.fetchall()
-        
-        if not errors:
+        c.execute(_SQL_DIAGNOSE_ERRORS)
+        
+        # Lecture par lots de 500 lignes plutôt qu'un fetchall de toutes les erreurs
+        c.arraysize = 500
+        errors = itertools.chain.from_iterable(iter(c.fetchmany, []))
+        first = next(errors, None)
+        
+        if first is None:
             print("✅ Aucun torrent en erreur trouvé !")
             return
         
-        print(f"\n🔍 DIAGNOSTIC DES ERREURS ({len(errors)} torrents)")
-        print("="*80)
-        
-        # Analyse détaillée de chaque erreur
-        for i, (torrent_id, name, status, error, progress, filename, added_on, bytes_size) in enumerate(errors, 1):
-            print(f"\n❌ ERREUR #{i}")
-            print(f"   🆔 ID             : {torrent_id}")
-            print(f"   📁 Nom            : {name or filename or 'N/A'}")
-            print(f"   📊 Statut         : {status}")
-            print(f"   ⚠️  Message d'erreur: {error or 'Aucun message spécifique'}")
-            print(f"   📈 Progression    : {progress or 0}%")
-            print(f"   📅 Ajouté le      : {added_on}")
-            print(f"   💾 Taille         : {format_size(bytes_size) if bytes_size else 'N/A'}")
+        # Rapport assemblé puis écrit en une fois ; l'en-tête (nombre
+        # d'erreurs) est complété après le parcours
+        out = [None]
+        out.append("="*80)
+        
+        # Analyse détaillée de chaque erreur, comptage par type dans la même passe
+        error_types = {}
+        for i, (torrent_id, name, status, error, progress, filename, added_on, bytes_size) in enumerate(itertools.chain((first,), errors), 1):
+            out.append(f"\n❌ ERREUR #{i}")
+            out.append(f"   🆔 ID             : {torrent_id}")
+            out.append(f"   📁 Nom            : {name or filename or 'N/A'}")
+            out.append(f"   📊 Statut         : {status}")
+            out.append(f"   ⚠️  Message d'erreur: {error or 'Aucun message spécifique'}")
+            out.append(f"   📈 Progression    : {progress or 0}%")
+            out.append(f"   📅 Ajouté le      : {added_on}")
+            out.append(f"   💾 Taille         : {format_size(bytes_size) if bytes_size else 'N/A'}")
             
             # Analyse automatique du type d'erreur
             error_type = analyze_error_type(error, status)
-            print(f"   🔬 Type d'erreur  : {error_type}")
+            error_types[error_type] = error_types.get(error_type, 0) + 1
+            out.append(f"   🔬 Type d'erreur  : {error_type}")
             
             # Suggestion de correction personnalisée
             suggestion = get_error_suggestion(error, status)
-            print(f"   💡 Suggestion     : {suggestion}")
-            print("-" * 80)
+            out.append(f"   💡 Suggestion     : {suggestion}")
+            out.append("-" * 80)
         
-        # Résumé statistique des types d'erreurs
-        print(f"\n📊 RÉSUMÉ DES TYPES D'ERREURS")
-        error_types = {}
-        for _, _, _, error, _, _, _, _ in errors:
-            error_type = analyze_error_type(error, None)
-            error_types[error_type] = error_types.get(error_type, 0) + 1
+        out[0] = f"\n🔍 DIAGNOSTIC DES ERREURS ({i} torrents)"
         
+        # Résumé statistique des types d'erreurs
+        out.append(f"\n📊 RÉSUMÉ DES TYPES D'ERREURS")
         for error_type, count in sorted(error_types.items(), key=lambda x: x[1], reverse=True):
-            print(f"   • {error_type} : {count}")
+            out.append(f"   • {error_type} : {count}")
         
         # Actions recommandées avec commandes exactes
-        print(f"\n💡 ACTIONS RECOMMANDÉES :")
-        print(f"   🔄 Retry automatique    : python src/main.py --sync-smart")
-        print(f"   🎯 Retry forcé          : python src/main.py --details-only --status error")
-        print(f"   📊 Vérifier l'état      : python src/main.py --stats")
+        out.append(f"\n💡 ACTIONS RECOMMANDÉES :")
+        out.append(f"   🔄 Retry automatique    : python src/main.py --sync-smart")
+        out.append(f"   🎯 Retry forcé          : python src/main.py --details-only --status error")
+        out.append(f"   📊 Vérifier l'état      : python src/main.py --stats")
+        sys.stdout.write("\n".join(out) + "\n")
 
 
 
@@ -1864,6 +2758,39 @@ def diagnose_errors():
 # ║                    SECTION 8: INTERFACE UTILISATEUR (MENU)                ║
 # ╚════════════════════════════════════════════════════════════════════════════╝
 
+# Texte fixe du menu interactif, assemblé une fois à l'import
+_MENU_STATIC = "\n".join([
+    "╔" + "═" * 58 + "╗",
+    "║" + " " * 20 + "🚀 MENU REDRIVA" + " " * 20 + "║",
+    "╠" + "═" * 58 + "╣",
+    "║ Outil de synchronisation Real-Debrid                  ║",
+    "╚" + "═" * 58 + "╝",
+
+    "\n📊 INFORMATIONS & DIAGNOSTIC",
+    "  1. 📈 Statistiques complètes",
+    "  2. 📋 Statistiques compactes",
+    "  3. 🔍 Diagnostiquer les erreurs",
+    " 13. 💾 Poids total (To) de tous les torrents",
+
+    "\n🔄 SYNCHRONISATION",
+    "  4. 🧠 Sync intelligent (recommandé)",
+    "  5. 🚀 Sync complet",
+    "  6. 📋 Vue d'ensemble (ultra-rapide)",
+    "  7. ⏮️  Reprendre sync interrompu",
+
+    "\n🔧 MAINTENANCE",
+    "  8. 🔄 Détails uniquement",
+    "  9. 🗑️  Vider la base de données",
+    " 10. 🔍 Diagnostic du token",
+
+    "\n❓ AIDE & SORTIE",
+    " 11. 💡 Guide de choix rapide",
+    " 12. 🏃 Mode commande (passer aux arguments)",
+    "  0. 🚪 Quitter",
+
+    "\n" + "─" * 60,
+]) + "\n"
+
 def show_interactive_menu():
     """
     Menu interactif principal pour faciliter l'utilisation de Redriva
@@ -1887,38 +2814,15 @@ def show_interactive_menu():
     import os
     
     while True:
-        # Effacer l'écran (compatible Linux/Mac/Windows)
-        os.system('clear' if os.name == 'posix' else 'cls')
-
-        print("╔" + "═" * 58 + "╗")
-        print("║" + " " * 20 + "🚀 MENU REDRIVA" + " " * 20 + "║")
-        print("╠" + "═" * 58 + "╣")
-        print("║ Outil de synchronisation Real-Debrid                  ║")
-        print("╚" + "═" * 58 + "╝")
-
-        print("\n📊 INFORMATIONS & DIAGNOSTIC")
-        print("  1. 📈 Statistiques complètes")
-        print("  2. 📋 Statistiques compactes")
-        print("  3. 🔍 Diagnostiquer les erreurs")
-        print(" 13. 💾 Poids total (To) de tous les torrents")
-
-        print("\n🔄 SYNCHRONISATION")
-        print("  4. 🧠 Sync intelligent (recommandé)")
-        print("  5. 🚀 Sync complet")
-        print("  6. 📋 Vue d'ensemble (ultra-rapide)")
-        print("  7. ⏮️  Reprendre sync interrompu")
-
-        print("\n🔧 MAINTENANCE")
-        print("  8. 🔄 Détails uniquement")
-        print("  9. 🗑️  Vider la base de données")
-        print(" 10. 🔍 Diagnostic du token")
-
-        print("\n❓ AIDE & SORTIE")
-        print(" 11. 💡 Guide de choix rapide")
-        print(" 12. 🏃 Mode commande (passer aux arguments)")
-        print("  0. 🚪 Quitter")
-
-        print("\n" + "─" * 60)
+        # Effacer l'écran (compatible Linux/Mac/Windows) : séquence ANSI écrite
+        # directement sous POSIX (même effet que `clear`, sans lancer de shell)
+        if os.name == 'posix':
+            sys.stdout.write('\x1b[H\x1b[2J\x1b[3J')
+            sys.stdout.flush()
+        else:
+            os.system('cls')
+
+        sys.stdout.write(_MENU_STATIC)
         
         try:
             choice = input("👉 Votre choix (0-13) : ").strip()
@@ -2058,8 +2962,7 @@ def main():
     - Diagnostic : --diagnose-errors
     - Maintenance : --details-only, --clear, --torrents-only
     """
-    
-    parser = argparse.ArgumentParser(description="Redriva - Synchroniseur Real-Debrid vers SQLite")
+    install_signal_handlers()
     
     # Si aucun argument n'est fourni, lancer le menu interactif
     if len(sys.argv) == 1:
@@ -2072,6 +2975,9 @@ def main():
             return
     
     # === ARGUMENTS DE LIGNE DE COMMANDE ===
+    # argparse n'est importé et construit que sur le chemin CLI
+    import argparse
+    parser = argparse.ArgumentParser(description="Redriva - Synchroniseur Real-Debrid vers SQLite")
     
     # Arguments de base
     parser.add_argument('--details-only', action='store_true', 